@@ -7,9 +7,9 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
 from .const import CONF_BRIDGE_PREFIX, DOMAIN
-from .coordinator import JookiCoordinator
+from .coordinator import JookiCoordinator, snapshot_store
 
-_PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER, Platform.SWITCH]
+_PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER, Platform.SENSOR, Platform.SWITCH]
 
 type JookiConfigEntry = ConfigEntry[JookiCoordinator]
 
@@ -19,23 +19,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: JookiConfigEntry) -> boo
     """Set up Jooki from a config entry."""
 
     bridge_prefix = entry.data[CONF_BRIDGE_PREFIX]
-    coordinator = JookiCoordinator(hass, bridge_prefix)
+    coordinator = JookiCoordinator(
+        hass,
+        bridge_prefix,
+        entry.options,
+        snapshot_store(hass, entry.entry_id),
+    )
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
+    await coordinator.async_restore_snapshot()
     await coordinator.async_start()
 
     await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: JookiConfigEntry) -> None:
+    """Reload a config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 # TODO Update entry annotation
 async def async_unload_entry(hass: HomeAssistant, entry: JookiConfigEntry) -> bool:
     """Unload a config entry."""
     coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
 
-    if coordinator is None:
+    if coordinator is not None:
         await coordinator.async_stop()
 
     return await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: JookiConfigEntry) -> None:
+    """Remove the state snapshot of a removed config entry."""
+    await snapshot_store(hass, entry.entry_id).async_remove()
@@ -0,0 +1,210 @@
+"""Artwork cache for Jooki media players."""
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+import hashlib
+import logging
+import mimetypes
+import os
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_ARTWORK: HassKey["ArtworkCache"] = HassKey(f"{DOMAIN}_artwork")
+
+MEMORY_MAX_IMAGES = 32
+MEMORY_MAX_BYTES = 8 * 1024 * 1024
+DISK_MAX_IMAGES = 512
+DISK_MAX_BYTES = 64 * 1024 * 1024
+
+Image = tuple[bytes | None, str | None]
+FetchCallback = Callable[[str], Awaitable[Image]]
+
+
+@callback
+def async_get_artwork_cache(hass: HomeAssistant) -> "ArtworkCache":
+    """Return the artwork cache shared by all Jooki media players."""
+    if (cache := hass.data.get(DATA_ARTWORK)) is None:
+        cache = hass.data[DATA_ARTWORK] = ArtworkCache(
+            hass, Path(hass.config.path(STORAGE_DIR, f"{DOMAIN}_artwork"))
+        )
+    return cache
+
+
+class ArtworkCache:
+    """Least recently used cache of artwork, in memory and on disk.
+
+    Images are looked up in memory, then on disk, and fetched only if both
+    miss. Concurrent requests for an image that is being loaded share one
+    load. Both levels are bounded by a number of images and a total size,
+    evicting the least recently used images first.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: Path,
+        *,
+        memory_max_images: int = MEMORY_MAX_IMAGES,
+        memory_max_bytes: int = MEMORY_MAX_BYTES,
+        disk_max_images: int = DISK_MAX_IMAGES,
+        disk_max_bytes: int = DISK_MAX_BYTES,
+    ) -> None:
+        """Initialize the cache, storing images in a directory."""
+        self._hass = hass
+        self._directory = directory
+        self._memory_max_images = memory_max_images
+        self._memory_max_bytes = memory_max_bytes
+        self._disk_max_images = disk_max_images
+        self._disk_max_bytes = disk_max_bytes
+        self._memory: OrderedDict[str, tuple[bytes, str | None]] = OrderedDict()
+        self._memory_bytes = 0
+        # File names and sizes per image, least recently used first. Loaded
+        # from the directory on first use.
+        self._disk: OrderedDict[str, tuple[str, int]] | None = None
+        self._disk_bytes = 0
+        self._loading: dict[str, asyncio.Task[Image]] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.fetches = 0
+        self.shared_loads = 0
+
+    async def async_get(self, url: str, fetch: FetchCallback) -> Image:
+        """Return the content and content type of an image."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        if (image := self._memory.get(key)) is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return image
+
+        if (task := self._loading.get(key)) is None:
+            task = self._loading[key] = self._hass.async_create_task(
+                self._async_load(key, url, fetch), name=f"Jooki artwork {key[:8]}"
+            )
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        else:
+            self.shared_loads += 1
+        return await asyncio.shield(task)
+
+    async def _async_load(self, key: str, url: str, fetch: FetchCallback) -> Image:
+        """Load an image from disk, or fetch it and store it."""
+        disk = await self._async_disk_index()
+        content: bytes | None
+        content_type: str | None
+        if (cached := disk.get(key)) is not None:
+            name = cached[0]
+            content = await self._hass.async_add_executor_job(self._read, name)
+            if content is not None and key in disk:
+                self.disk_hits += 1
+                disk.move_to_end(key)
+                content_type = mimetypes.guess_type(name)[0]
+                self._remember(key, content, content_type)
+                return content, content_type
+            if (unreadable := disk.pop(key, None)) is not None:
+                self._disk_bytes -= unreadable[1]
+
+        self.fetches += 1
+        content, content_type = await fetch(url)
+        if content is None:
+            return None, None
+
+        self._remember(key, content, content_type)
+        name = key + (mimetypes.guess_extension(content_type or "") or "")
+        evicted = self._admit_disk(disk, key, name, len(content))
+        await self._hass.async_add_executor_job(self._write, name, content, evicted)
+        return content, content_type
+
+    def _remember(self, key: str, content: bytes, content_type: str | None) -> None:
+        """Keep an image in memory, evicting the least recently used ones."""
+        if len(content) > self._memory_max_bytes:
+            return
+        self._memory[key] = (content, content_type)
+        self._memory_bytes += len(content)
+        while (
+            len(self._memory) > self._memory_max_images
+            or self._memory_bytes > self._memory_max_bytes
+        ):
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _admit_disk(
+        self, disk: OrderedDict[str, tuple[str, int]], key: str, name: str, size: int
+    ) -> list[str]:
+        """Account for a new file on disk and return the files to evict."""
+        disk[key] = (name, size)
+        self._disk_bytes += size
+        evicted = []
+        while len(disk) > 1 and (
+            len(disk) > self._disk_max_images or self._disk_bytes > self._disk_max_bytes
+        ):
+            _, (old_name, old_size) = disk.popitem(last=False)
+            self._disk_bytes -= old_size
+            evicted.append(old_name)
+        return evicted
+
+    async def _async_disk_index(self) -> OrderedDict[str, tuple[str, int]]:
+        """Return the cached files, loading their names and sizes on first use."""
+        if self._disk is None:
+            files = await self._hass.async_add_executor_job(self._scan)
+            # Another load may have finished while this one was scanning
+            if self._disk is None:
+                self._disk = OrderedDict(
+                    (name.partition(".")[0], (name, size)) for name, size in files
+                )
+                self._disk_bytes = sum(size for _, size in files)
+        return self._disk
+
+    def _scan(self) -> list[tuple[str, int]]:
+        """Return the cached files and their sizes by last use."""
+        try:
+            entries = list(os.scandir(self._directory))
+        except FileNotFoundError:
+            return []
+        stats = [(entry.name, entry.stat()) for entry in entries if entry.is_file()]
+        stats.sort(key=lambda item: item[1].st_mtime)
+        return [(name, stat.st_size) for name, stat in stats]
+
+    def _read(self, name: str) -> bytes | None:
+        """Read a cached file and mark it as used."""
+        path = self._directory / name
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except OSError as err:
+            _LOGGER.debug("Could not read cached artwork %s: %s", name, err)
+            return None
+        return content
+
+    def _write(self, name: str, content: bytes, evicted: list[str]) -> None:
+        """Write a file to the cache and delete evicted ones."""
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            (self._directory / name).write_bytes(content)
+        except OSError as err:
+            _LOGGER.warning("Could not cache artwork %s: %s", name, err)
+        for old_name in evicted:
+            try:
+                (self._directory / old_name).unlink(missing_ok=True)
+            except OSError as err:
+                _LOGGER.warning("Could not evict cached artwork %s: %s", old_name, err)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the size and hit counts of the cache."""
+        return {
+            "memory_images": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_images": len(self._disk) if self._disk is not None else None,
+            "disk_bytes": self._disk_bytes if self._disk is not None else None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "fetches": self.fetches,
+            "shared_loads": self.shared_loads,
+        }
@@ -0,0 +1,360 @@
+"""Media browser over the Jooki device library."""
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from homeassistant.components.media_player import BrowseError, BrowseMedia
+from homeassistant.components.media_player.const import MediaClass, MediaType
+
+from .library import (
+    PLAYLISTS_STATE_PATH,
+    TRACKS_STATE_PATH,
+    TRASH_PLAYLIST_ID,
+    affects_path,
+)
+
+TOKENS_STATE_PATH = "db.tokens"
+
+# Children per page of a node. Further pages are reached through a last child.
+PAGE_SIZE = 100
+
+# Content ids are "kind" for directories or "kind:key" for items, followed
+# by "@page" for pages after the first one
+ROOT = "root"
+PLAYLISTS = "playlists"
+TRACKS = "tracks"
+TOKENS = "tokens"
+PLAYLIST = "playlist"
+TRACK = "track"
+TOKEN = "token"
+# A track at an index of a playlist, keyed "playlist_id/index"
+PLAYLIST_TRACK = "playlist_track"
+CONTENT_KINDS = frozenset(
+    {ROOT, PLAYLISTS, TRACKS, TOKENS, PLAYLIST, TRACK, TOKEN, PLAYLIST_TRACK}
+)
+
+LIBRARY_CONTENT_TYPE = "library"
+
+_DIRECTORY_TITLES = {PLAYLISTS: "Playlists", TRACKS: "Tracks", TOKENS: "Tokens"}
+
+
+def parse_content_id(content_id: str | None) -> tuple[str, str, int]:
+    """Split a content id into its kind, key and zero based page."""
+    if not content_id:
+        return ROOT, "", 0
+    page = 0
+    base, separator, page_number = content_id.rpartition("@")
+    if separator and page_number.isdigit():
+        content_id, page = base, int(page_number)
+    kind, _, key = content_id.partition(":")
+    return kind, key, page
+
+
+def content_id(kind: str, key: str = "", page: int = 0) -> str:
+    """Return the content id of a node."""
+    node = f"{kind}:{key}" if key else kind
+    return f"{node}@{page}" if page else node
+
+
+def _sort_key(item: tuple[str, dict[str, Any]]) -> tuple[str, str]:
+    """Sort library items by title, then by id."""
+    item_id, item = item
+    return str(item.get("title") or item.get("name") or item_id).casefold(), item_id
+
+
+class JookiMediaBrowser:
+    """Browse tree over the playlists, tracks and tokens in the device library.
+
+    Nodes are built only when browsed and cached per page, together with the
+    sorted item lists they page through. Changes to a section of the library
+    drop only the nodes showing that section, and nothing outside `db` does.
+    """
+
+    def __init__(self, get_state: Callable[[str], Any]) -> None:
+        """Initialize the browser with a state path getter."""
+        self._get_state = get_state
+        # Cached pages per kind, keyed by item key and page
+        self._nodes: dict[str, dict[tuple[str, int], BrowseMedia]] = {}
+        self._sorted: dict[str, list[str]] = {}
+        # Track id to the first playlist containing it and its index there
+        self._track_playlists: dict[str, tuple[str, int]] | None = None
+
+    def invalidate(self, changed: set[str]) -> None:
+        """Drop the cached nodes that show any of the changed library paths."""
+        if not self._nodes and not self._sorted and self._track_playlists is None:
+            return
+        if not affects_path(changed, "db"):
+            return
+
+        if affects_path(changed, TRACKS_STATE_PATH):
+            # Track titles show up in every listing of tracks
+            self._drop(TRACKS, PLAYLIST, TOKEN)
+        if affects_path(changed, PLAYLISTS_STATE_PATH):
+            self._drop(PLAYLISTS, TOKEN)
+            self._track_playlists = None
+            self._drop_playlists(changed)
+        if affects_path(changed, TOKENS_STATE_PATH):
+            self._drop(TOKENS, TOKEN)
+
+    def _drop(self, *kinds: str) -> None:
+        """Drop the cached nodes and sorted lists of kinds."""
+        for kind in kinds:
+            self._nodes.pop(kind, None)
+            self._sorted.pop(kind, None)
+
+    def _drop_playlists(self, changed: set[str]) -> None:
+        """Drop the cached nodes of changed playlists, or all if none is named."""
+        if not (nodes := self._nodes.get(PLAYLIST)):
+            return
+        prefix = f"{PLAYLISTS_STATE_PATH}."
+        playlist_ids = set()
+        for path in changed:
+            if not path.startswith(prefix):
+                if affects_path({path}, PLAYLISTS_STATE_PATH):
+                    self._nodes.pop(PLAYLIST, None)
+                    return
+                continue
+            playlist_ids.add(path[len(prefix) :].partition(".")[0])
+        for key in [key for key in nodes if key[0] in playlist_ids]:
+            del nodes[key]
+
+    def _section(self, path: str) -> dict[str, Any]:
+        """Return a section of the library, or an empty one."""
+        section = self._get_state(path)
+        return section if isinstance(section, dict) else {}
+
+    def _sorted_ids(self, kind: str, path: str) -> list[str]:
+        """Return the item ids of a section sorted by title."""
+        if (ids := self._sorted.get(kind)) is None:
+            items = self._section(path).items()
+            ids = self._sorted[kind] = [
+                item_id
+                for item_id, _ in sorted(
+                    (item for item in items if isinstance(item[1], dict)),
+                    key=_sort_key,
+                )
+                if item_id != TRASH_PLAYLIST_ID
+            ]
+        return ids
+
+    def browse(self, media_content_id: str | None) -> BrowseMedia:
+        """Return the node for a content id, building it if needed."""
+        kind, key, page = parse_content_id(media_content_id)
+        nodes = self._nodes.get(kind)
+        if nodes is None or (node := nodes.get((key, page))) is None:
+            node = self._build(kind, key, page)
+            self._nodes.setdefault(kind, {})[key, page] = node
+        return node
+
+    def _build(self, kind: str, key: str, page: int) -> BrowseMedia:
+        """Build the node for a page of a content id."""
+        if kind == ROOT:
+            return BrowseMedia(
+                media_class=MediaClass.DIRECTORY,
+                media_content_id=ROOT,
+                media_content_type=LIBRARY_CONTENT_TYPE,
+                title="Jooki",
+                can_play=False,
+                can_expand=True,
+                children=[self._directory(kind) for kind in _DIRECTORY_TITLES],
+                children_media_class=MediaClass.DIRECTORY,
+            )
+        if kind == PLAYLISTS:
+            ids = self._sorted_ids(PLAYLISTS, PLAYLISTS_STATE_PATH)
+            return self._page(
+                self._directory(kind, page),
+                ids,
+                page,
+                self._playlist_item,
+                MediaClass.PLAYLIST,
+            )
+        if kind == TRACKS:
+            ids = self._sorted_ids(TRACKS, TRACKS_STATE_PATH)
+            return self._page(
+                self._directory(kind, page),
+                ids,
+                page,
+                self._track_item,
+                MediaClass.TRACK,
+            )
+        if kind == TOKENS:
+            ids = self._sorted_ids(TOKENS, TOKENS_STATE_PATH)
+            return self._page(
+                self._directory(kind, page),
+                ids,
+                page,
+                self._token_item,
+                MediaClass.PLAYLIST,
+            )
+        if kind == PLAYLIST:
+            return self._playlist_page(key, page, self._playlist_item(key))
+        if kind == TOKEN:
+            token = self._section(TOKENS_STATE_PATH).get(key)
+            if not isinstance(token, dict):
+                raise BrowseError(f"Unknown Jooki token: {key}")
+            return self._playlist_page(
+                token.get("playlistId"), page, self._token_item(key)
+            )
+        raise BrowseError(f"Cannot browse {content_id(kind, key, page)}")
+
+    def item(self, kind: str, key: str) -> BrowseMedia:
+        """Return the item for a playlist or track."""
+        if kind == PLAYLIST:
+            return self._playlist_item(key)
+        if kind == TRACK:
+            return self._track_item(key)
+        raise BrowseError(f"No item for {content_id(kind, key)}")
+
+    def _playlist_page(
+        self, playlist_id: str | None, page: int, parent: BrowseMedia
+    ) -> BrowseMedia:
+        """Return a page of the tracks of a playlist under a parent item."""
+        playlist = self._section(PLAYLISTS_STATE_PATH).get(playlist_id)
+        if playlist_id is None or not isinstance(playlist, dict):
+            raise BrowseError(f"Unknown Jooki playlist: {playlist_id}")
+        tracks = self._section(TRACKS_STATE_PATH)
+        track_ids = playlist.get("tracks") or []
+
+        def entry(index: int) -> BrowseMedia:
+            return self._track_item(
+                track_ids[index],
+                tracks,
+                content_id(PLAYLIST_TRACK, f"{playlist_id}/{index}"),
+            )
+
+        if page:
+            parent.media_content_id = content_id(
+                *parse_content_id(parent.media_content_id)[:2], page
+            )
+        return self._page(parent, range(len(track_ids)), page, entry, MediaClass.TRACK)
+
+    def _page(
+        self,
+        parent: BrowseMedia,
+        keys: Sequence[Any],
+        page: int,
+        build_child: Callable[[Any], BrowseMedia],
+        children_media_class: MediaClass,
+    ) -> BrowseMedia:
+        """Fill a parent with one page of children and a link to the next page."""
+        start = page * PAGE_SIZE
+        if start and start >= len(keys):
+            raise BrowseError(f"No page {page + 1} of {parent.media_content_id}")
+        children = [build_child(key) for key in keys[start : start + PAGE_SIZE]]
+        if (remaining := len(keys) - start - len(children)) > 0:
+            kind, key, _ = parse_content_id(parent.media_content_id)
+            children.append(
+                BrowseMedia(
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_id=content_id(kind, key, page + 1),
+                    media_content_type=LIBRARY_CONTENT_TYPE,
+                    title=f"More ({remaining})",
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+        parent.children = children
+        parent.children_media_class = children_media_class
+        return parent
+
+    def _directory(self, kind: str, page: int = 0) -> BrowseMedia:
+        """Return the item for a top level directory."""
+        title = _DIRECTORY_TITLES[kind]
+        return BrowseMedia(
+            media_class=MediaClass.DIRECTORY,
+            media_content_id=content_id(kind, page=page),
+            media_content_type=LIBRARY_CONTENT_TYPE,
+            title=f"{title} ({page + 1})" if page else title,
+            can_play=False,
+            can_expand=True,
+        )
+
+    def _playlist_item(self, playlist_id: str) -> BrowseMedia:
+        """Return the item for a playlist."""
+        playlist = self._section(PLAYLISTS_STATE_PATH).get(playlist_id)
+        if not isinstance(playlist, dict):
+            raise BrowseError(f"Unknown Jooki playlist: {playlist_id}")
+        return BrowseMedia(
+            media_class=MediaClass.PLAYLIST,
+            media_content_id=content_id(PLAYLIST, playlist_id),
+            media_content_type=MediaType.PLAYLIST,
+            title=playlist.get("title") or playlist_id,
+            can_play=True,
+            can_expand=True,
+        )
+
+    def _track_item(
+        self,
+        track_id: str,
+        tracks: dict[str, Any] | None = None,
+        media_content_id: str | None = None,
+    ) -> BrowseMedia:
+        """Return the item for a track."""
+        if tracks is None:
+            tracks = self._section(TRACKS_STATE_PATH)
+        track = tracks.get(track_id)
+        if not isinstance(track, dict):
+            track = {}
+        title = track.get("title") or track_id
+        if artist := track.get("artist"):
+            title = f"{artist} - {title}"
+        return BrowseMedia(
+            media_class=MediaClass.TRACK,
+            media_content_id=media_content_id or content_id(TRACK, track_id),
+            media_content_type=MediaType.TRACK,
+            title=title,
+            can_play=True,
+            can_expand=False,
+        )
+
+    def _token_item(self, token_id: str) -> BrowseMedia:
+        """Return the item for a token, which plays its playlist."""
+        token = self._section(TOKENS_STATE_PATH).get(token_id)
+        if not isinstance(token, dict):
+            token = {}
+        playlist_title = None
+        if (playlist_id := token.get("playlistId")) is not None:
+            playlist = self._section(PLAYLISTS_STATE_PATH).get(playlist_id)
+            if isinstance(playlist, dict):
+                playlist_title = playlist.get("title")
+        title = token.get("title") or token.get("name") or token_id
+        return BrowseMedia(
+            media_class=MediaClass.PLAYLIST,
+            media_content_id=content_id(TOKEN, token_id),
+            media_content_type=MediaType.PLAYLIST,
+            title=f"{title} ({playlist_title})" if playlist_title else title,
+            can_play=playlist_id is not None,
+            can_expand=playlist_id is not None,
+        )
+
+    def resolve_play(self, media_content_id: str) -> tuple[str, int] | None:
+        """Return the playlist id and one based track index to play a content id."""
+        kind, key, _ = parse_content_id(media_content_id)
+        playlists = self._section(PLAYLISTS_STATE_PATH)
+        if kind == PLAYLIST:
+            return (key, 1) if key in playlists else None
+        if kind == PLAYLIST_TRACK:
+            playlist_id, _, index = key.rpartition("/")
+            if playlist_id in playlists and index.isdigit():
+                return playlist_id, int(index) + 1
+            return None
+        if kind == TOKEN:
+            token = self._section(TOKENS_STATE_PATH).get(key)
+            if isinstance(token, dict) and token.get("playlistId") in playlists:
+                return token["playlistId"], 1
+            return None
+        if kind == TRACK:
+            if (location := self._track_locations().get(key)) is not None:
+                return location[0], location[1] + 1
+        return None
+
+    def _track_locations(self) -> dict[str, tuple[str, int]]:
+        """Return the first playlist containing each track and its index there."""
+        if self._track_playlists is None:
+            self._track_playlists = {}
+            for playlist_id, playlist in self._section(PLAYLISTS_STATE_PATH).items():
+                if playlist_id == TRASH_PLAYLIST_ID or not isinstance(playlist, dict):
+                    continue
+                for index, track_id in enumerate(playlist.get("tracks") or ()):
+                    self._track_playlists.setdefault(track_id, (playlist_id, index))
+        return self._track_playlists
@@ -0,0 +1,99 @@
+"""Outgoing command queue for Jooki."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import PLAYLIST_PLAY_TOPIC, SEEK_TOPIC, TOY_SAFE_TOPIC, VOL_TOPIC
+
+_LOGGER = logging.getLogger(__name__)
+
+# Payload for commands without arguments
+EMPTY_PAYLOAD = "{}"
+
+# Commands that set absolute state, so only the latest pending one matters.
+# Relative commands such as next and previous track are never coalesced.
+COALESCED_TOPICS = frozenset(
+    {PLAYLIST_PLAY_TOPIC, SEEK_TOPIC, TOY_SAFE_TOPIC, VOL_TOPIC}
+)
+
+
+class CommandQueue:
+    """Rate limit commands per topic, keeping only the latest pending payload.
+
+    A command is published right away unless the same topic was published
+    less than the minimum interval ago. It is then held until the interval
+    has passed, and replaced by any newer command for the topic meanwhile.
+    Callers wait until the payload they are merged into has been published.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        publish: Callable[[str, str], Awaitable[None]],
+        min_interval: float,
+    ) -> None:
+        """Initialize the queue with the function that publishes a payload."""
+        self._hass = hass
+        self._publish = publish
+        self._min_interval = min_interval
+        self._last_sent: dict[str, float] = {}
+        self._pending: dict[str, tuple[str, asyncio.Future[None]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+
+    async def async_send(self, topic: str, payload: str) -> None:
+        """Publish a payload, or coalesce it with one waiting on the topic."""
+        if (pending := self._pending.get(topic)) is not None:
+            _LOGGER.debug("Replacing pending payload for %s: %s", topic, payload)
+            future = pending[1]
+            self._pending[topic] = (payload, future)
+            await asyncio.shield(future)
+            return
+
+        now = self._hass.loop.time()
+        wait = self._last_sent.get(topic, -self._min_interval) + self._min_interval - now
+        if wait <= 0:
+            self._last_sent[topic] = now
+            await self._publish(topic, payload)
+            return
+
+        future = self._hass.loop.create_future()
+        self._pending[topic] = (payload, future)
+        self._timers[topic] = self._hass.loop.call_later(
+            wait, self._async_flush, topic
+        )
+        await asyncio.shield(future)
+
+    @callback
+    def _async_flush(self, topic: str) -> None:
+        """Publish the pending payload for a topic."""
+        self._timers.pop(topic, None)
+        payload, future = self._pending.pop(topic)
+        self._last_sent[topic] = self._hass.loop.time()
+
+        task = self._hass.async_create_task(self._publish(topic, payload))
+
+        @callback
+        def _async_resolve(task: asyncio.Task[None]) -> None:
+            if future.done():
+                return
+            if task.cancelled():
+                future.cancel()
+            elif (err := task.exception()) is not None:
+                future.set_exception(err)
+            else:
+                future.set_result(None)
+
+        task.add_done_callback(_async_resolve)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop all pending commands."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
@@ -2,19 +2,65 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.core import HomeAssistant
+from homeassistant.components import mqtt
+from homeassistant.components.mqtt.models import ReceiveMessage
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.selector import (
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+)
 
-from .const import CONF_BRIDGE_PREFIX, DOMAIN
+from .commands import EMPTY_PAYLOAD
+from .const import (
+    CONF_BRIDGE_PREFIX,
+    CONF_COALESCE_WINDOW,
+    CONF_DEBUG_SUMMARY_INTERVAL,
+    CONF_DEVICE_HOST,
+    CONF_EXECUTOR_THRESHOLD,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MAX_MISSED_PROBES,
+    CONF_MIN_COMMAND_INTERVAL,
+    CONF_POSITION_INTERPOLATION,
+    CONF_POSITION_RESYNC_THRESHOLD,
+    CONF_PROBE_INTERVAL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DEBUG_SUMMARY_INTERVAL,
+    DEFAULT_EXECUTOR_THRESHOLD,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_MISSED_PROBES,
+    DEFAULT_MIN_COMMAND_INTERVAL,
+    DEFAULT_POSITION_INTERPOLATION,
+    DEFAULT_POSITION_RESYNC_THRESHOLD,
+    DEFAULT_PROBE_INTERVAL,
+    DOMAIN,
+    PING_TOPIC,
+    PONG_TOPIC,
+    STATE_TOPIC,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+PING_TIMEOUT = 3  # Seconds
+# Subscriptions reach the broker a moment after they are made, so a pong to
+# the first ping can be missed and pings are repeated until one is answered
+PING_RESEND_INTERVAL = 0.5  # Seconds
+# How long discovery listens for devices and their answers to pings
+DISCOVERY_TIMEOUT = 3  # Seconds
+
 # TODO adjust the data schema to the data that you need
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -22,6 +68,107 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(
+            CONF_COALESCE_WINDOW, default=DEFAULT_COALESCE_WINDOW
+        ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+        vol.Optional(
+            CONF_POSITION_INTERPOLATION, default=DEFAULT_POSITION_INTERPOLATION
+        ): bool,
+        vol.Optional(
+            CONF_POSITION_RESYNC_THRESHOLD, default=DEFAULT_POSITION_RESYNC_THRESHOLD
+        ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+        vol.Optional(
+            CONF_EXECUTOR_THRESHOLD, default=DEFAULT_EXECUTOR_THRESHOLD
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(
+            CONF_MIN_COMMAND_INTERVAL, default=DEFAULT_MIN_COMMAND_INTERVAL
+        ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+        vol.Optional(
+            CONF_HEARTBEAT_INTERVAL, default=DEFAULT_HEARTBEAT_INTERVAL
+        ): vol.All(vol.Coerce(float), vol.Range(min=1, max=300)),
+        vol.Optional(
+            CONF_PROBE_INTERVAL, default=DEFAULT_PROBE_INTERVAL
+        ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=60)),
+        vol.Optional(
+            CONF_MAX_MISSED_PROBES, default=DEFAULT_MAX_MISSED_PROBES
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+        vol.Optional(
+            CONF_DEBUG_SUMMARY_INTERVAL, default=DEFAULT_DEBUG_SUMMARY_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+        vol.Optional(CONF_DEVICE_HOST): str,
+    }
+)
+
+
+async def async_ping(
+    hass: HomeAssistant, bridge_prefix: str, timeout: float = PING_TIMEOUT
+) -> bool:
+    """Ping a device until it answers and return if it did within a timeout."""
+    pong = hass.loop.create_future()
+
+    @callback
+    def pong_received(msg: ReceiveMessage) -> None:
+        if not pong.done():
+            pong.set_result(None)
+
+    unsubscribe = await mqtt.async_subscribe(
+        hass, f"{bridge_prefix}/{PONG_TOPIC}", pong_received
+    )
+    try:
+        async with asyncio.timeout(timeout):
+            while not pong.done():
+                await mqtt.async_publish(
+                    hass, f"{bridge_prefix}/{PING_TOPIC}", EMPTY_PAYLOAD
+                )
+                await asyncio.wait((pong,), timeout=PING_RESEND_INTERVAL)
+    except TimeoutError:
+        return False
+    finally:
+        unsubscribe()
+    return True
+
+
+async def async_discover_prefixes(
+    hass: HomeAssistant, timeout: float = DISCOVERY_TIMEOUT
+) -> set[str]:
+    """Return the bridge prefixes of the devices answering pings within a timeout.
+
+    MQTT cannot publish to a wildcard, so devices are found by listening for
+    their messages on the wildcard state and pong topics. Every prefix heard
+    from is pinged at once, and only those that answer are returned, which
+    leaves out stale retained states of devices that are gone. Only single
+    level prefixes match the wildcards.
+    """
+    heard: set[str] = set()
+    answered: set[str] = set()
+
+    @callback
+    def message_received(msg: ReceiveMessage) -> None:
+        prefix = msg.topic.partition("/")[0]
+        if msg.topic.endswith(PONG_TOPIC):
+            answered.add(prefix)
+        elif prefix not in heard:
+            heard.add(prefix)
+            hass.async_create_task(
+                mqtt.async_publish(hass, f"{prefix}/{PING_TOPIC}", EMPTY_PAYLOAD),
+                eager_start=True,
+            )
+
+    unsubscribes = await asyncio.gather(
+        *(
+            mqtt.async_subscribe(hass, f"+/{suffix}", message_received)
+            for suffix in (STATE_TOPIC, PONG_TOPIC)
+        )
+    )
+    try:
+        await asyncio.sleep(timeout)
+    finally:
+        for unsubscribe in unsubscribes:
+            unsubscribe()
+    return answered
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
@@ -30,12 +177,16 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     """
     bridge_prefix = data[CONF_BRIDGE_PREFIX]
 
-    # TODO: maybe use hass to look for a ping pong response over mqtt now
-
     # Raise an exception if the prefix does not contain strictly characters valid in an mqtt topic name
     if not all(c.isalnum() or c in ("_", "-", "/") for c in bridge_prefix):
         raise CannotConnect
 
+    if not await mqtt.async_wait_for_mqtt_client(hass):
+        raise CannotConnect
+    if not await async_ping(hass, bridge_prefix):
+        _LOGGER.debug("No pong from Jooki with prefix %s", bridge_prefix)
+        raise CannotConnect
+
     # Return info that you want to store in the config entry.
     return {"title": "My Jooki"}
 
@@ -45,6 +196,16 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovered: list[str] | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Create the options flow."""
+        return JookiOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -52,6 +213,9 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
         if user_input is not None:
             user_input[CONF_BRIDGE_PREFIX] = user_input[CONF_BRIDGE_PREFIX].rstrip("/")
+            self._async_abort_entries_match(
+                {CONF_BRIDGE_PREFIX: user_input[CONF_BRIDGE_PREFIX]}
+            )
 
             try:
                 info = await validate_input(self.hass, user_input)
@@ -63,8 +227,56 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
             else:
                 return self.async_create_entry(title=info["title"], data=user_input)
 
+        if self._discovered is None:
+            self._discovered = await self._async_discover()
+        if not self._discovered:
+            return self.async_show_form(
+                step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            )
+
+        # Discovered prefixes are offered, while another can still be entered
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_BRIDGE_PREFIX): SelectSelector(
+                        SelectSelectorConfig(
+                            options=self._discovered,
+                            custom_value=True,
+                            mode=SelectSelectorMode.DROPDOWN,
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def _async_discover(self) -> list[str]:
+        """Return the prefixes of the devices found that are not configured yet."""
+        if not await mqtt.async_wait_for_mqtt_client(self.hass):
+            return []
+        configured = {
+            entry.data.get(CONF_BRIDGE_PREFIX)
+            for entry in self._async_current_entries(include_ignore=False)
+        }
+        return sorted(await async_discover_prefixes(self.hass) - configured)
+
+
+class JookiOptionsFlow(OptionsFlow):
+    """Handle options for Jooki."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, self.config_entry.options
+            ),
         )
 
 
@@ -3,6 +3,28 @@
 DOMAIN = "jooki"
 CONF_BRIDGE_PREFIX: str = "mqtt_bridge_prefix"
 
+# Options
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_POSITION_INTERPOLATION = "position_interpolation"
+CONF_POSITION_RESYNC_THRESHOLD = "position_resync_threshold"
+CONF_EXECUTOR_THRESHOLD = "executor_threshold"
+CONF_MIN_COMMAND_INTERVAL = "min_command_interval"
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+CONF_PROBE_INTERVAL = "probe_interval"
+CONF_MAX_MISSED_PROBES = "max_missed_probes"
+CONF_DEBUG_SUMMARY_INTERVAL = "debug_summary_interval"
+CONF_DEVICE_HOST = "device_host"
+
+DEFAULT_COALESCE_WINDOW = 0.25  # Seconds
+DEFAULT_POSITION_INTERPOLATION = True
+DEFAULT_POSITION_RESYNC_THRESHOLD = 2.0  # Seconds
+DEFAULT_EXECUTOR_THRESHOLD = 32768  # Bytes
+DEFAULT_MIN_COMMAND_INTERVAL = 0.25  # Seconds
+DEFAULT_HEARTBEAT_INTERVAL = 5.0  # Seconds
+DEFAULT_PROBE_INTERVAL = 1.0  # Seconds
+DEFAULT_MAX_MISSED_PROBES = 2
+DEFAULT_DEBUG_SUMMARY_INTERVAL = 0  # Minutes, 0 disables
+
 # Topics for interaction
 PING_TOPIC = "/j/debug/input/ping"
 PONG_TOPIC = "/j/debug/output/pong"
@@ -17,3 +39,40 @@ VOL_TOPIC = "/j/web/input/SET_VOL"
 OFF_TOPIC = "/j/web/input/SHUTDOWN"
 PLAYLIST_PLAY_TOPIC = "/j/web/input/PLAYLIST_PLAY"
 TOY_SAFE_TOPIC = "/j/web/input/SET_TOY_SAFE"
+
+# State paths
+PLAYBACK_STATE_PATH = "audio.playback.state"
+POSITION_STATE_PATH = "audio.playback.position_ms"
+VOLUME_STATE_PATH = "audio.config.volume"
+
+# Services
+SERVICE_PLAY_PLAYLIST_AND_WAIT = "play_playlist_and_wait"
+SERVICE_SEEK_AND_WAIT = "seek_and_wait"
+SERVICE_SET_VOLUME_AND_WAIT = "set_volume_and_wait"
+
+ATTR_PLAYLIST = "playlist"
+ATTR_TRACK_INDEX = "track_index"
+ATTR_TIMEOUT = "timeout"
+ATTR_LATENCY = "latency"
+SERVICE_GROUP_COMMAND = "group_command"
+
+ATTR_COMMAND = "command"
+ATTR_WAIT = "wait"
+ATTR_SUCCESS = "success"
+ATTR_ERROR = "error"
+SERVICE_GET_LISTENING_TIME = "get_listening_time"
+ATTR_DURATION = "duration"
+
+# Commands of the group command service
+GROUP_COMMAND_PLAY = "play"
+GROUP_COMMAND_PAUSE = "pause"
+GROUP_COMMAND_VOLUME_SET = "volume_set"
+GROUP_COMMAND_PLAYLIST_PLAY = "playlist_play"
+GROUP_COMMAND_TURN_OFF = "turn_off"
+GROUP_COMMANDS = (
+    GROUP_COMMAND_PLAY,
+    GROUP_COMMAND_PAUSE,
+    GROUP_COMMAND_VOLUME_SET,
+    GROUP_COMMAND_PLAYLIST_PLAY,
+    GROUP_COMMAND_TURN_OFF,
+)
@@ -1,33 +1,106 @@
 """Data Update Coordinator for Jooki."""
 
 import asyncio
-import json
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping
+import contextlib
+from datetime import datetime, timedelta
 import logging
+import random
+import time
 from typing import Any, cast
 
 from homeassistant.components import mqtt
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.json import json_dumps
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-
-from .const import GET_STATE_TOPIC, PING_TOPIC, PONG_TOPIC, STATE_TOPIC
+from homeassistant.util.json import json_loads_object
+
+from .browse_media import JookiMediaBrowser
+from .commands import COALESCED_TOPICS, EMPTY_PAYLOAD, CommandQueue
+from .const import (
+    CONF_COALESCE_WINDOW,
+    CONF_DEBUG_SUMMARY_INTERVAL,
+    CONF_DEVICE_HOST,
+    CONF_EXECUTOR_THRESHOLD,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MAX_MISSED_PROBES,
+    CONF_MIN_COMMAND_INTERVAL,
+    CONF_POSITION_INTERPOLATION,
+    CONF_POSITION_RESYNC_THRESHOLD,
+    CONF_PROBE_INTERVAL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DEBUG_SUMMARY_INTERVAL,
+    DEFAULT_EXECUTOR_THRESHOLD,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_MISSED_PROBES,
+    DEFAULT_MIN_COMMAND_INTERVAL,
+    DEFAULT_POSITION_INTERPOLATION,
+    DEFAULT_POSITION_RESYNC_THRESHOLD,
+    DEFAULT_PROBE_INTERVAL,
+    DOMAIN,
+    GET_STATE_TOPIC,
+    PING_TOPIC,
+    PONG_TOPIC,
+    POSITION_STATE_PATH,
+    STATE_TOPIC,
+)
+from .history import PlaybackHistory
+from .hub import async_get_hub
+from .library import JookiLibrary, affects_path
+from .search import JookiSearchIndex
+from .stats import JookiCounters, JookiStats
 
 _LOGGER = logging.getLogger(__name__)
 
 JSON = dict[str, Any]
 
 
-PING_INTERVAL = 30  # Seconds
+OPTIMISTIC_TIMEOUT = 10  # Seconds
+COMMAND_TIMEOUT = 10  # Seconds
+FIRST_STATE_TIMEOUT = 5  # Seconds
+# Subscriptions reach the broker a moment after they are made, so a quick
+# answer to the first state request can be lost and requests are repeated
+FIRST_STATE_RESEND_INTERVAL = 0.5  # Seconds
+# Pings sent to keep round trip times current while traffic makes liveness
+# probes unnecessary
+RTT_PING_INTERVAL = 60  # Seconds
+
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 30  # Seconds
+# Top level state sections kept across restarts. Playback state is left out
+# since it is stale by the time Home Assistant starts again.
+SNAPSHOT_SECTIONS = ("db", "device")
+
+# Sentinels for the state path index
+_MISSING = object()
+_ABSENT = object()
 
 
-def parse_state(payload: bytes) -> JSON:
+def parse_state(payload: bytes | str) -> JSON:
     """Parse the state payload and return a structured dictionary."""
     try:
-        return json.loads(payload)
-    except json.JSONDecodeError as e:
+        return cast(JSON, json_loads_object(payload))
+    except ValueError as e:
         _LOGGER.error("Failed to parse JSON payload: %s", e)
         return {}
 
 
+def drop_unchanged_sections(old_data: JSON, new_data: JSON) -> JSON:
+    """Return the top level sections of new data that differ from old data.
+
+    Comparing whole sections is done in C and is much cheaper than walking
+    unchanged sections, such as a large `db`, in `merge_data`.
+    """
+    return {
+        key: value
+        for key, value in new_data.items()
+        if old_data.get(key, _MISSING) != value
+    }
+
+
 def merge_data(
     old_data: JSON, new_data: JSON, path: str = ""
 ) -> tuple[JSON, set[str]]:
@@ -52,10 +125,118 @@ def merge_data(
     return old_data, changed
 
 
+def diff_data(
+    old_data: JSON, new_data: JSON, path: str = ""
+) -> tuple[JSON, set[str]]:
+    """Return the part of new data that merge_data would change, without merging.
+
+    Applying the returned delta with `merge_data` gives the same result as
+    merging new data directly, so the diff can be computed off the event loop.
+    """
+    delta: JSON = {}
+    changed: set[str] = set()
+
+    for key, new_value in new_data.items():
+        if (
+            isinstance(new_value, dict)
+            and key in old_data
+            and isinstance(old_data[key], dict)
+        ):
+            sub_delta, re_changed = diff_data(
+                old_data[key], new_value, path=f"{path}.{key}" if path else key
+            )
+            if sub_delta:
+                delta[key] = sub_delta
+                changed.update(re_changed)
+        elif key not in old_data or old_data[key] != new_value:
+            delta[key] = new_value
+            changed.add(f"{path}.{key}" if path else key)
+
+    return delta, changed
+
+
+def path_ancestors(path: str) -> list[str]:
+    """Return the proper ancestors of a dotted path, outermost first."""
+    keys = path.split(".")
+    return [".".join(keys[:i]) for i in range(1, len(keys))]
+
+
+def expand_paths(paths: Iterable[str]) -> set[str]:
+    """Return the given dotted paths together with all of their ancestors."""
+    expanded: set[str] = set()
+    for path in paths:
+        if path not in expanded:
+            expanded.add(path)
+            expanded.update(path_ancestors(path))
+    return expanded
+
+
+class StatePathIndex:
+    """Flat index of values in a nested state dictionary keyed by dotted path.
+
+    Each path is split into its keys once, the first time it is looked up, and
+    the resolved value is cached. The changed paths reported by `merge_data`
+    are used to drop only the cached values that could have been affected.
+    """
+
+    def __init__(self, data: JSON) -> None:
+        """Initialize the index over the given data."""
+        self._data = data
+        self._compiled: dict[str, tuple[str, ...]] = {}
+        self._values: dict[str, Any] = {}
+        # Maps every prefix of a compiled path to the compiled paths beneath it
+        self._dependents: dict[str, set[str]] = {}
+
+    def _compile(self, path: str) -> tuple[str, ...]:
+        """Split a path into keys and register it for invalidation."""
+        keys = tuple(path.split("."))
+        self._compiled[path] = keys
+        for i in range(1, len(keys) + 1):
+            self._dependents.setdefault(".".join(keys[:i]), set()).add(path)
+        return keys
+
+    def get(self, path: str, default: Any | None = None) -> Any | None:
+        """Return the value at a dotted path, or default if it is not present."""
+        value = self._values.get(path, _MISSING)
+        if value is _MISSING:
+            keys = self._compiled.get(path) or self._compile(path)
+            value = self._data
+            for key in keys:
+                if isinstance(value, dict) and key in value:
+                    value = value[key]
+                else:
+                    value = _ABSENT
+                    break
+            self._values[path] = value
+
+        return default if value is _ABSENT else value
+
+    def invalidate(self, changed: set[str]) -> None:
+        """Drop cached values at or below any of the changed paths.
+
+        `merge_data` mutates nested dictionaries in place, so cached values of
+        ancestors of a changed path still point at the right objects.
+        """
+        for changed_path in changed:
+            for path in self._dependents.get(changed_path, ()):
+                self._values.pop(path, None)
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store[JSON]:
+    """Return the store holding the state snapshot for a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
 class JookiCoordinator(DataUpdateCoordinator):
     """Data Update Coordinator for Jooki."""
 
-    def __init__(self, hass: HomeAssistant, bridge_prefix: str):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        bridge_prefix: str,
+        options: Mapping[str, Any] | None = None,
+        store: Store[JSON] | None = None,
+    ):
         """Initialize the Jooki coordinator."""
         super().__init__(
             hass,
@@ -63,11 +244,85 @@ class JookiCoordinator(DataUpdateCoordinator):
             name="Jooki Media Player Coordinator",
         )
         self._hass = hass
-        self._ping_task = None
+        self._store = store
+        self._unregister: CALLBACK_TYPE | None = None
         self._missed_pongs = 0
         self._device_available = True
+        # Event loop time of the last message received from the device
+        self._last_seen = 0.0
+        # Event loop time of the last ping sent
+        self._last_ping: float | None = None
+        # Event loop time the full state was last requested
+        self._state_requested: float | None = None
+        self._first_state = asyncio.Event()
         self.data: dict[str, Any] = {}
         self._bridge_prefix = bridge_prefix.rstrip("/").lstrip("/")
+        self._state_index = StatePathIndex(self.data)
+        # Sections restored from the snapshot and not yet sent by the device
+        self._restored_sections: frozenset[str] = frozenset()
+        self.library = JookiLibrary(self.get_state)
+        self.media_browser = JookiMediaBrowser(self.get_state)
+        self.search_index = JookiSearchIndex(self.get_state)
+        # Sampled from the device state, leaving out optimistic values
+        self.history = PlaybackHistory(self._state_index.get)
+        self.stats = JookiStats()
+        self.counters = JookiCounters()
+        # Last raw state payload, used to skip identical re-sent states
+        self._last_state_payload: bytes | str | None = None
+        # State payloads waiting behind one being decoded in the executor
+        self._state_backlog: deque[bytes | str] = deque()
+        self._decode_task: asyncio.Task | None = None
+        # Requests the first state in the background when a snapshot was restored
+        self._first_state_task: asyncio.Task | None = None
+        # Listener contexts mapped to the ancestors of their path prefixes
+        self._context_ancestors: dict[tuple[str, ...], frozenset[str]] = {}
+
+        options = options or {}
+        self.coalesce_window: float = options.get(
+            CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW
+        )
+        self.position_interpolation: bool = options.get(
+            CONF_POSITION_INTERPOLATION, DEFAULT_POSITION_INTERPOLATION
+        )
+        self.position_resync_threshold: float = options.get(
+            CONF_POSITION_RESYNC_THRESHOLD, DEFAULT_POSITION_RESYNC_THRESHOLD
+        )
+        self.executor_threshold: int = options.get(
+            CONF_EXECUTOR_THRESHOLD, DEFAULT_EXECUTOR_THRESHOLD
+        )
+        self.heartbeat_interval: float = options.get(
+            CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL
+        )
+        self.probe_interval: float = options.get(
+            CONF_PROBE_INTERVAL, DEFAULT_PROBE_INTERVAL
+        )
+        self.max_missed_probes: int = options.get(
+            CONF_MAX_MISSED_PROBES, DEFAULT_MAX_MISSED_PROBES
+        )
+        self.debug_summary_interval: int = options.get(
+            CONF_DEBUG_SUMMARY_INTERVAL, DEFAULT_DEBUG_SUMMARY_INTERVAL
+        )
+        # Host serving the images the device refers to by path
+        self.device_host: str | None = options.get(CONF_DEVICE_HOST) or None
+        self._unsub_debug_summary: CALLBACK_TYPE | None = None
+        self._commands = CommandQueue(
+            hass,
+            self._async_publish_payload,
+            options.get(CONF_MIN_COMMAND_INTERVAL, DEFAULT_MIN_COMMAND_INTERVAL),
+        )
+
+        # Changed paths waiting for the coalescing window to close
+        self._pending_changes: set[str] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Expected values of paths shown until the device confirms or times out
+        self._optimistic: dict[str, tuple[Any, asyncio.TimerHandle]] = {}
+        # Paths changed by the update currently being dispatched, None if all
+        self.changed_paths: set[str] | None = None
+        # Commands waiting for the device to report their effect, as the state
+        # path, the check of its value and a future set to the confirmation time
+        self._waiters: list[
+            tuple[str, Callable[[Any], bool], asyncio.Future[float]]
+        ] = []
 
     @property
     def available(self):
@@ -75,107 +330,518 @@ class JookiCoordinator(DataUpdateCoordinator):
         return self._device_available
 
     async def async_publish(self, topic_suffix: str, payload: dict | str | None = None):
-        """Publish a message to the MQTT broker with the bridge prefix."""
-        full_topic = f"{self._bridge_prefix}/{topic_suffix}"
+        """Publish a message to the MQTT broker with the bridge prefix.
+
+        Commands setting absolute state go through the command queue, which
+        rate limits them and drops superseded ones.
+        """
         if payload is None:
-            payload = "{}"
+            payload = EMPTY_PAYLOAD
         elif isinstance(payload, dict):
-            payload = json.dumps(payload)
+            payload = json_dumps(payload)
+
+        if topic_suffix in COALESCED_TOPICS:
+            await self._commands.async_send(topic_suffix, payload)
+        else:
+            await self._async_publish_payload(topic_suffix, payload)
+
+    async def async_command(
+        self,
+        topic_suffix: str,
+        payload: dict | str | None,
+        path: str,
+        check: Callable[[Any], bool],
+        timeout: float = COMMAND_TIMEOUT,
+    ) -> float:
+        """Publish a command and wait until the device reports its effect.
+
+        The command has taken effect once a state message changes the path, or
+        a path above or below it, and the device value at the path passes the
+        check. Returns the seconds from sending the command to that message, or
+        0 if the device state already passed the check. Raises TimeoutError if
+        the device does not confirm the command within timeout.
+        """
+        loop = self._hass.loop
+        start = loop.time()
+        if check(self._state_index.get(path)):
+            await self.async_publish(topic_suffix, payload)
+            return 0.0
+
+        waiter = (path, check, loop.create_future())
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(timeout):
+                await self.async_publish(topic_suffix, payload)
+                confirmed = await waiter[2]
+        finally:
+            self._waiters.remove(waiter)
+
+        latency = confirmed - start
+        self.counters.add_timing("command_latency", latency)
+        _LOGGER.debug("Device confirmed %s after %.3f s.", topic_suffix, latency)
+        return latency
+
+    async def _async_publish_payload(self, topic_suffix: str, payload: str):
+        """Publish a serialized payload to a topic under the bridge prefix."""
+        full_topic = f"{self._bridge_prefix}/{topic_suffix}"
         _LOGGER.debug("Publishing payload to topic %s: %s", full_topic, payload)
         await mqtt.async_publish(self._hass, full_topic, payload)
 
-    async def _mqtt_message_received(self, msg):
+    @callback
+    def _mqtt_message_received(self, msg):
         """Handle incoming MQTT messages."""
         topic = msg.topic
         payload = msg.payload
 
+        # Any message from the device proves it is alive
+        self._last_seen = self._hass.loop.time()
+        self._missed_pongs = 0
+        if not self._device_available:
+            _LOGGER.info("Device is available again.")
+            self._device_available = True
+            self.history.record(available=True)
+            self.async_update_listeners()
+
         if topic.endswith(PONG_TOPIC):
             _LOGGER.debug("Received PONG from device.")
-            self._missed_pongs = 0
-            self._device_available = True
-            self.async_set_updated_data(self.data)
+            self.stats.pong_received()
             return
 
         if topic.endswith(STATE_TOPIC):
+            # Sizes are in bytes, also for payloads delivered already decoded
+            size = len(payload.encode() if isinstance(payload, str) else payload)
+            self.stats.state_received(size)
+            if payload == self._last_state_payload:
+                _LOGGER.debug("Received unchanged state payload from device.")
+                self.counters.messages_unchanged += 1
+                return
+
+            self._last_state_payload = payload
             _LOGGER.debug("Received state update from device: %s", payload)
-            try:
-                message_data = parse_state(payload)
-                self.data, changed = merge_data(self.data, message_data)
-                # Notify only if there are meaningful changes
-                if changed and changed != {"audio.playback.position_ms"}:
-                    self.async_set_updated_data(self.data)
 
-            except json.JSONDecodeError as e:
-                _LOGGER.error("Error decoding MQTT message: %s", e)
+            # Small payloads are applied inline unless an earlier large one is
+            # still being decoded, in which case they queue up behind it.
+            if self._decode_task is None and size < self.executor_threshold:
+                self._async_apply_state(*self._parse_state(payload))
+                return
+
+            self._state_backlog.append(payload)
+            if self._decode_task is None:
+                self._decode_task = self._hass.async_create_background_task(
+                    self._async_process_state_backlog(),
+                    name=f"Jooki state decoder {self._bridge_prefix}",
+                )
+
+    def _split_restored_sections(self, message_data: JSON) -> JSON:
+        """Remove and return the sections of a message replacing restored ones.
+
+        Merging never removes keys, so items deleted on the device while Home
+        Assistant was stopped would otherwise survive in the restored sections.
+        Sections equal to the restored ones are returned as the restored
+        objects, so applying them only takes an identity check on the loop.
+        """
+        replaced: JSON = {}
+        for section in self._restored_sections:
+            if section in message_data:
+                value = message_data.pop(section)
+                current = self.data.get(section, _MISSING)
+                replaced[section] = current if current == value else value
+        return replaced
+
+    def _parse_state(self, payload: bytes | str) -> tuple[JSON, JSON]:
+        """Parse a state payload, keeping only sections that differ from the data.
+
+        Sections replacing restored ones are returned separately.
+        """
+        start = time.perf_counter()
+        message_data = parse_state(payload)
+        self.counters.add_timing("parse_state", time.perf_counter() - start)
+        replaced = self._split_restored_sections(message_data)
+        return drop_unchanged_sections(self.data, message_data), replaced
+
+    def _decode_state_delta(self, payload: bytes | str) -> tuple[JSON, JSON, float]:
+        """Parse a state payload and diff it against the current data.
+
+        Runs in the executor, so the parse time is returned to be recorded on
+        the event loop. The state backlog guarantees no other state message is
+        merged while this is running.
+        """
+        start = time.perf_counter()
+        message_data = parse_state(payload)
+        parse_time = time.perf_counter() - start
+        replaced = self._split_restored_sections(message_data)
+        message_data = drop_unchanged_sections(self.data, message_data)
+        delta, _ = diff_data(self.data, message_data)
+        return delta, replaced, parse_time
+
+    async def _async_process_state_backlog(self):
+        """Apply queued state payloads in order, decoding large ones in the executor."""
+        try:
+            while self._state_backlog:
+                payload = self._state_backlog.popleft()
+                if len(payload) < self.executor_threshold:
+                    message_data, replaced = self._parse_state(payload)
+                else:
+                    (
+                        message_data,
+                        replaced,
+                        parse_time,
+                    ) = await self._hass.async_add_executor_job(
+                        self._decode_state_delta, payload
+                    )
+                    self.counters.add_timing("parse_state", parse_time)
+                self._async_apply_state(message_data, replaced)
+        finally:
+            self._decode_task = None
+
+    @callback
+    def _async_apply_state(
+        self, message_data: JSON, replaced: JSON | None = None
+    ) -> None:
+        """Merge parsed state into the data and notify about the changes.
+
+        Replaced sections are set as a whole rather than merged.
+        """
+        start = time.perf_counter()
+        changed: set[str] = set()
+        for section, value in (replaced or {}).items():
+            self._restored_sections -= {section}
+            if self.data.get(section, _MISSING) is not value:
+                self.data[section] = value
+                changed.add(section)
+        self.data, merged = merge_data(self.data, message_data)
+        changed |= merged
+        self.counters.add_timing("merge_data", time.perf_counter() - start)
+        self.counters.changed_paths.update(changed)
+        self._state_index.invalidate(changed)
+        self._first_state.set()
+        self.library.invalidate(changed)
+        self.media_browser.invalidate(changed)
+        self.search_index.update(changed)
+        self.history.update(changed, self._device_available)
+        if self._store is not None and any(
+            path.partition(".")[0] in SNAPSHOT_SECTIONS for path in changed
+        ):
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        if self._optimistic:
+            self._async_reconcile_optimistic(changed)
+        if self._waiters:
+            self._async_resolve_waiters(changed)
+        # Notify only if there are meaningful changes. Position only
+        # changes are left to the entity when it interpolates position.
+        if changed and (
+            self.position_interpolation or changed != {POSITION_STATE_PATH}
+        ):
+            self._async_schedule_changes(changed)
+        else:
+            self.counters.messages_unchanged += 1
+
+    @callback
+    def _async_schedule_changes(self, changed: set[str]) -> None:
+        """Queue changed paths, dispatching at most once per coalescing window.
+
+        The first change after a quiet window is dispatched immediately, and
+        changes arriving within the window are merged into one trailing dispatch.
+        """
+        self._pending_changes.update(changed)
+        if self._flush_handle is None:
+            self._async_flush_changes()
+        else:
+            self.counters.messages_coalesced += 1
+
+    @callback
+    def _async_flush_changes(self) -> None:
+        """Dispatch pending changed paths and open a new coalescing window."""
+        self._flush_handle = None
+        if not self._pending_changes:
+            return
 
-    def get_state(self, path: str, default: Any | None = None) -> Any | None:
-        """Get the state value from nested dictionaries using dot notation."""
-        keys = path.split(".")
-        value: Any = self.data
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
+        changed = self._pending_changes
+        self._pending_changes = set()
+        if self.coalesce_window > 0:
+            self._flush_handle = self._hass.loop.call_later(
+                self.coalesce_window, self._async_flush_changes
+            )
+        self.async_update_changed_listeners(changed)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners, as for an availability change."""
+        self.changed_paths = None
+        for update_callback, _ in list(self._listeners.values()):
+            self._async_run_listener(update_callback)
+
+    @callback
+    def async_update_changed_listeners(self, changed: set[str]) -> None:
+        """Update the listeners whose state path prefixes intersect the changed paths.
+
+        A listener matches if one of its prefixes is a changed path or an
+        ancestor of one, or if a changed path is an ancestor of its prefix.
+        Listeners registered without a context are always updated.
+        """
+        self.changed_paths = changed
+        expanded = expand_paths(changed)
+        for update_callback, context in list(self._listeners.values()):
+            if context is None:
+                self._async_run_listener(update_callback)
+                continue
+
+            ancestors = self._context_ancestors.get(context)
+            if ancestors is None:
+                ancestors = self._context_ancestors[context] = frozenset(
+                    expand_paths(context).difference(context)
+                )
+            if not expanded.isdisjoint(context) or not ancestors.isdisjoint(changed):
+                self._async_run_listener(update_callback)
             else:
-                value = default
-                break
+                self.counters.notifications_suppressed += 1
+
+    @callback
+    def _async_run_listener(self, update_callback: CALLBACK_TYPE) -> None:
+        """Run a listener, timing it per entity."""
+        start = time.perf_counter()
+        update_callback()
+        entity = getattr(update_callback, "__self__", None)
+        self.counters.add_entity_timing(
+            getattr(entity, "entity_id", None) or repr(update_callback),
+            time.perf_counter() - start,
+        )
+        self.counters.notifications_dispatched += 1
+
+    def get_state(self, path: str, default: Any | None = None) -> Any | None:
+        """Get the state value from nested dictionaries using dot notation.
+
+        Optimistic values for a path take precedence over the device state.
+        """
+        if self._optimistic and (optimistic := self._optimistic.get(path)):
+            return optimistic[0]
+        return self._state_index.get(path, default)
+
+    @callback
+    def async_set_optimistic(
+        self, path: str, value: Any, timeout: float = OPTIMISTIC_TIMEOUT
+    ) -> None:
+        """Show an expected value for a path until the device reports it.
+
+        The value is dropped once the path shows up in the changed paths of a
+        state message, or rolled back if that does not happen within timeout.
+        """
+        if (previous := self._optimistic.pop(path, None)) is not None:
+            previous[1].cancel()
+        if self._state_index.get(path) == value:
+            # The device will not report a change, so nothing would confirm
+            # the value. Dropping a previous value still needs a notification.
+            if previous is not None:
+                self.async_update_changed_listeners({path})
+            return
 
-        return value
+        self._optimistic[path] = (
+            value,
+            self._hass.loop.call_later(timeout, self._async_expire_optimistic, path),
+        )
+        self.async_update_changed_listeners({path})
+
+    @callback
+    def _async_reconcile_optimistic(self, changed: set[str]) -> None:
+        """Drop optimistic values for paths the device has reported."""
+        for path in list(self._optimistic):
+            if path in changed or not changed.isdisjoint(path_ancestors(path)):
+                _LOGGER.debug("Device confirmed optimistic state for %s.", path)
+                self._optimistic.pop(path)[1].cancel()
+
+    @callback
+    def _async_resolve_waiters(self, changed: set[str]) -> None:
+        """Confirm the commands whose effect the changed paths show."""
+        now = self._hass.loop.time()
+        for path, check, future in self._waiters:
+            if (
+                not future.done()
+                and affects_path(changed, path)
+                and check(self._state_index.get(path))
+            ):
+                future.set_result(now)
+
+    @callback
+    def _async_expire_optimistic(self, path: str) -> None:
+        """Roll back an optimistic value the device never confirmed."""
+        if self._optimistic.pop(path, None) is None:
+            return
+        _LOGGER.warning("Device did not confirm %s in time; reverting.", path)
+        self.async_update_changed_listeners({path})
+
+    async def _request_state(self):
+        """Ask the device for its full state."""
+        self._state_requested = self._hass.loop.time()
+        await self.async_publish(GET_STATE_TOPIC)
 
     async def _send_ping(self):
         """Send a ping message to check device availability."""
+        self._last_ping = self._hass.loop.time()
+        self.stats.ping_sent()
         await self.async_publish(PING_TOPIC)
 
-    async def _start_ping_loop(self):
-        """Start a periodic ping loop."""
-        try:
-            while True:
-                await self._send_ping()
-
-                self._missed_pongs += 1
+    def _snapshot(self) -> JSON:
+        """Return the state sections to save in the snapshot."""
+        return {
+            section: self.data[section]
+            for section in SNAPSHOT_SECTIONS
+            if section in self.data
+        }
 
-                if self._missed_pongs > 2 and self._device_available:
-                    _LOGGER.warning(
-                        "Device is unavailable after missing multiple pongs."
-                    )
-                    self._device_available = False
-                    self.async_set_updated_data(self.data)
-
-                await asyncio.sleep(PING_INTERVAL)
-
-                # If no state or no db present, ask for a refresh the full device state
-                if (
-                    self._device_available
-                    and not (
-                        self.data
-                        and self.get_state("db")
-                    )
-                ):
-                    _LOGGER.debug("No state updates received; requesting state.")
-                    await self.async_publish(GET_STATE_TOPIC)
+    async def async_restore_snapshot(self) -> None:
+        """Merge the last saved state snapshot into the data.
 
-        except asyncio.CancelledError:
+        The first live state of each section from the device replaces it.
+        """
+        if self._store is None or not (snapshot := await self._store.async_load()):
             return
 
+        _LOGGER.debug("Restoring state snapshot with sections: %s", list(snapshot))
+        self.data, changed = merge_data(self.data, snapshot)
+        self._restored_sections = frozenset(snapshot) & frozenset(SNAPSHOT_SECTIONS)
+        self._state_index.invalidate(changed)
+        self.library.invalidate(changed)
+        self.media_browser.invalidate(changed)
+        self.search_index.update(changed)
+
+    async def async_heartbeat(self) -> float:
+        """Check device liveness and return the seconds until the next heartbeat.
+
+        While messages keep arriving the device is not pinged. Once it has
+        been silent for the heartbeat interval it is probed at the shorter,
+        jittered probe interval, and marked unavailable when too many probes
+        go unanswered. Unavailable devices are probed at the heartbeat interval.
+        """
+        # If no live state, no live db or no db at all is present, ask for a
+        # refresh of the full device state. A restored snapshot does not count.
+        # Every request makes the device send a full dump, so ask at most once
+        # per heartbeat interval rather than on every probe.
+        now = self._hass.loop.time()
+        if (
+            self._device_available
+            and (
+                not self._first_state.is_set()
+                or self._restored_sections
+                or not self.get_state("db")
+            )
+            and (
+                self._state_requested is None
+                or now - self._state_requested >= self.heartbeat_interval
+            )
+        ):
+            _LOGGER.debug("No state updates received; requesting state.")
+            await self._request_state()
+
+        quiet = now - self._last_seen
+        if self._device_available and not self._missed_pongs:
+            if quiet < self.heartbeat_interval:
+                # The device is alive, but keep measuring round trip times.
+                # Unanswered measurement pings do not count as missed.
+                since_ping = (
+                    now - self._last_ping if self._last_ping is not None else None
+                )
+                if since_ping is None or since_ping >= RTT_PING_INTERVAL:
+                    await self._send_ping()
+                    since_ping = 0
+                return min(
+                    self.heartbeat_interval - quiet, RTT_PING_INTERVAL - since_ping
+                )
+
+        if self._missed_pongs >= self.max_missed_probes and self._device_available:
+            _LOGGER.warning("Device is unavailable after missing multiple pongs.")
+            self._device_available = False
+            self.history.record(available=False)
+            self.async_update_listeners()
+
+        await self._send_ping()
+        self._missed_pongs += 1
+
+        if not self._device_available:
+            return self.heartbeat_interval
+        return self.probe_interval * random.uniform(0.8, 1.2)
+
+    @callback
+    def _async_log_debug_summary(self, now: datetime) -> None:
+        """Log a summary of the hot path counters."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Summary for %s: stats=%s counters=%s",
+                self._bridge_prefix,
+                self.stats.as_dict(),
+                self.counters.as_dict(top_paths=10),
+            )
+
     async def async_start(self):
         """Start the coordinator."""
         _LOGGER.info("Starting Jooki Coordinator.")
-        await mqtt.async_subscribe(
-            self._hass,
-            f"{self._bridge_prefix}/{PONG_TOPIC}",
-            self._mqtt_message_received,
-        )
-        await mqtt.async_subscribe(
-            self._hass,
-            f"{self._bridge_prefix}/{STATE_TOPIC}",
+        hub = await async_get_hub(self._hass)
+        self._unregister = await hub.async_register(
+            self._bridge_prefix,
             self._mqtt_message_received,
+            self.async_heartbeat,
+            self.heartbeat_interval,
         )
 
-        # Start the ping loop
-        self._ping_task = self._hass.loop.create_task(self._start_ping_loop())
+        if self.debug_summary_interval:
+            self._unsub_debug_summary = async_track_time_interval(
+                self._hass,
+                self._async_log_debug_summary,
+                timedelta(minutes=self.debug_summary_interval),
+            )
+
+        # Ask for the full state right away rather than on the first heartbeat,
+        # and give the device a round trip to answer so entities start populated.
+        # The startup pings count as one probe.
+        self._missed_pongs += 1
+        if self.data:
+            # Entities can render from the restored snapshot meanwhile
+            self._first_state_task = self._hass.async_create_background_task(
+                self._async_request_first_state(),
+                name=f"Jooki first state {self._bridge_prefix}",
+            )
+            return
+        await self._async_request_first_state()
+
+    async def _async_request_first_state(self) -> None:
+        """Request the state and ping until the first state arrives."""
+        try:
+            async with asyncio.timeout(FIRST_STATE_TIMEOUT):
+                while not self._first_state.is_set():
+                    await asyncio.gather(self._request_state(), self._send_ping())
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(
+                            self._first_state.wait(), FIRST_STATE_RESEND_INTERVAL
+                        )
+        except TimeoutError:
+            _LOGGER.warning(
+                "No state received from device within %s seconds of starting.",
+                FIRST_STATE_TIMEOUT,
+            )
+        finally:
+            self._first_state_task = None
 
     async def async_stop(self):
         """Stop the coordinator."""
         _LOGGER.info("Stopping Jooki Coordinator.")
-        if self._ping_task:
-            self._ping_task.cancel()
-            self._ping_task = None
+        if self._unregister:
+            self._unregister()
+            self._unregister = None
+        if self._unsub_debug_summary:
+            self._unsub_debug_summary()
+            self._unsub_debug_summary = None
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._decode_task:
+            self._decode_task.cancel()
+            self._decode_task = None
+        if self._first_state_task:
+            self._first_state_task.cancel()
+            self._first_state_task = None
+        self._state_backlog.clear()
+        self._commands.async_cancel()
+        for _, handle in self._optimistic.values():
+            handle.cancel()
+        self._optimistic.clear()
+        for _, _, future in self._waiters:
+            future.cancel()
@@ -0,0 +1,39 @@
+"""Diagnostics support for Jooki."""
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from . import JookiConfigEntry
+from .artwork import DATA_ARTWORK
+from .const import DOMAIN
+from .coordinator import JookiCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: JookiConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: JookiCoordinator = hass.data[DOMAIN][entry.entry_id]
+    data = coordinator.data
+
+    # The library can be very large, so only its size is included
+    db = data.get("db") or {}
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "available": coordinator.available,
+        "stats": coordinator.stats.as_dict(),
+        "counters": coordinator.counters.as_dict(),
+        "history": coordinator.history.as_dict(),
+        "artwork": (
+            artwork.as_dict() if (artwork := hass.data.get(DATA_ARTWORK)) else None
+        ),
+        "state": {key: value for key, value in data.items() if key != "db"},
+        "db": {
+            section: len(value) if isinstance(value, dict | list) else value
+            for section, value in db.items()
+        },
+    }
@@ -0,0 +1,47 @@
+"""Base entity for Jooki."""
+
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import JookiCoordinator
+
+
+class JookiEntity(CoordinatorEntity[JookiCoordinator]):
+    """Base for entities backed by the Jooki coordinator.
+
+    Each entity declares the dotted state path prefixes it renders, and is only
+    updated when the coordinator reports a change intersecting one of them.
+    """
+
+    def __init__(self, coordinator: JookiCoordinator, state_paths: tuple[str, ...]):
+        """Initialize the entity with the state paths it depends on."""
+        super().__init__(coordinator, context=state_paths)
+        # Rendered values at the last state write
+        self._written_fingerprint: tuple[Any, ...] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Render the state the coordinator already has when added."""
+        await super().async_added_to_hass()
+        self._written_fingerprint = None
+        self._handle_coordinator_update()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state, counting writes for diagnostics."""
+        self.coordinator.counters.state_writes[self.entity_id] += 1
+        super().async_write_ha_state()
+
+    @callback
+    def _async_write_state_if_changed(self, fingerprint: tuple[Any, ...]) -> None:
+        """Write the state unless the rendered values match the last write.
+
+        The fingerprint holds every value the entity renders, with bulky ones
+        such as lists stood in for by a version that changes with them.
+        """
+        if fingerprint == self._written_fingerprint:
+            self.coordinator.counters.state_writes_skipped += 1
+            return
+        self._written_fingerprint = fingerprint
+        self.async_write_ha_state()
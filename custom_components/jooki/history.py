@@ -0,0 +1,222 @@
+"""In-memory playback history for Jooki devices."""
+
+from array import array
+from collections.abc import Callable, Iterator
+import time
+from typing import Any
+
+from .const import PLAYBACK_STATE_PATH, POSITION_STATE_PATH, VOLUME_STATE_PATH
+from .library import PLAYLISTS_STATE_PATH, affects_path
+
+HISTORY_MAX_BYTES = 64 * 1024
+
+NOW_PLAYING_PLAYLIST_PATH = "audio.nowPlaying.playlistId"
+NOW_PLAYING_INDEX_PATH = "audio.nowPlaying.queueIndex"
+
+# Paths whose changes start a new sample. Position only changes are left out,
+# since the time between samples already measures playback.
+_SAMPLED_PATHS = (PLAYBACK_STATE_PATH, VOLUME_STATE_PATH, "audio.nowPlaying")
+
+# Playback states as stored in a sample, OFF when the device is unavailable
+PLAYBACK_STATES = ("OFF", "IDLE", "STARTING", "PLAYING", "PAUSED", "ENDED")
+_STATE_CODES = {state: code for code, state in enumerate(PLAYBACK_STATES)}
+_PLAYING = _STATE_CODES["PLAYING"]
+
+# Array type codes of the sample fields: milliseconds since the previous
+# sample, playback state, volume, interned playlist and track ids and position
+_TIME_DELTA = "I"
+_FIELDS = ("B", "B", "H", "H", "I")
+SAMPLE_BYTES = sum(array(code).itemsize for code in (_TIME_DELTA, *_FIELDS))
+_MAX_DELTA = 2 ** (8 * array(_TIME_DELTA).itemsize) - 1
+_MAX_STRINGS = 2 ** (8 * array("H").itemsize) - 1
+
+
+def _zeros(code: str, length: int) -> array:
+    """Return an array of zeros."""
+    return array(code, bytes(length * array(code).itemsize))
+
+
+class PlaybackHistory:
+    """Ring buffer of playback samples within a fixed byte budget.
+
+    A sample is recorded whenever the playback state, volume or now playing
+    track changes. Each field is kept in its own preallocated array, with
+    times stored as the milliseconds since the previous sample and ids
+    interned as small integers. Once full, the oldest samples are overwritten.
+    """
+
+    def __init__(
+        self, get_state: Callable[[str], Any], max_bytes: int = HISTORY_MAX_BYTES
+    ) -> None:
+        """Initialize an empty history with a device state path getter."""
+        self._get_state = get_state
+        # Each sample refers to at most two ids, which must fit their arrays
+        self.capacity = min(max(2, max_bytes // SAMPLE_BYTES), _MAX_STRINGS // 2 - 16)
+        self._deltas = _zeros(_TIME_DELTA, self.capacity)
+        self._fields = [_zeros(code, self.capacity) for code in _FIELDS]
+        # Index of the oldest sample and the number of samples
+        self._start = 0
+        self._count = 0
+        # Milliseconds since the epoch of the oldest and newest samples
+        self._first_time = 0
+        self._last_time = 0
+        # State, volume and ids of the newest sample
+        self._last_key: tuple[int, int, str | None, str | None] | None = None
+        # Interned ids, with 0 standing for none
+        self._strings: list[str | None] = [None]
+        self._string_codes: dict[str | None, int] = {None: 0}
+
+    def update(self, changed: set[str], available: bool) -> None:
+        """Record a sample if the changed paths touch the sampled state."""
+        if any(affects_path(changed, path) for path in _SAMPLED_PATHS):
+            self.record(available)
+
+    def record(self, available: bool, now: float | None = None) -> None:
+        """Record the current playback state, unless it did not change."""
+        if available:
+            state = self._get_state(PLAYBACK_STATE_PATH)
+            state_code = _STATE_CODES.get(
+                state.upper() if isinstance(state, str) else "IDLE", 1
+            )
+            volume = self._get_state(VOLUME_STATE_PATH)
+            playlist_id = self._get_state(NOW_PLAYING_PLAYLIST_PATH)
+            track_id = self._track_id(playlist_id)
+        else:
+            state_code, volume, playlist_id, track_id = 0, None, None, None
+
+        volume = min(max(int(volume), 0), 255) if isinstance(volume, int | float) else 0
+        key = (state_code, volume, playlist_id, track_id)
+        if key == self._last_key:
+            return
+        self._last_key = key
+
+        position = self._get_state(POSITION_STATE_PATH) if available else None
+        timestamp = int((time.time() if now is None else now) * 1000)
+        # Samples are dropped before ids are interned, so that compacting the
+        # ids only keeps those of samples that remain
+        self._make_room(timestamp)
+        if len(self._strings) + 2 > 2 * self._count + 16:
+            self._compact_strings()
+        self._append(
+            timestamp,
+            (
+                state_code,
+                volume,
+                self._intern(playlist_id),
+                self._intern(track_id),
+                min(max(int(position), 0), _MAX_DELTA)
+                if isinstance(position, int | float)
+                else 0,
+            ),
+        )
+
+    def _track_id(self, playlist_id: Any) -> str | None:
+        """Return the id of the now playing track of a playlist."""
+        index = self._get_state(NOW_PLAYING_INDEX_PATH)
+        if not isinstance(playlist_id, str) or not isinstance(index, int):
+            return None
+        tracks = self._get_state(f"{PLAYLISTS_STATE_PATH}.{playlist_id}.tracks")
+        if isinstance(tracks, list) and 0 <= index < len(tracks):
+            return tracks[index]
+        return None
+
+    def _intern(self, value: Any) -> int:
+        """Return the code of an id, assigning one if it is new."""
+        if not isinstance(value, str):
+            return 0
+        if (code := self._string_codes.get(value)) is None:
+            code = self._string_codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def _compact_strings(self) -> None:
+        """Drop the interned ids no longer referenced by any sample."""
+        strings: list[str | None] = [None]
+        codes: dict[str | None, int] = {None: 0}
+        playlists, tracks = self._fields[2], self._fields[3]
+        for index in self._indexes():
+            for field in (playlists, tracks):
+                value = self._strings[field[index]]
+                if (code := codes.get(value)) is None:
+                    code = codes[value] = len(strings)
+                    strings.append(value)
+                field[index] = code
+        self._strings = strings
+        self._string_codes = codes
+
+    def _indexes(self) -> range | list[int]:
+        """Return the array indexes of the samples, oldest first."""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return range(self._start, end)
+        return [*range(self._start, self.capacity), *range(end - self.capacity)]
+
+    def _make_room(self, timestamp: int) -> None:
+        """Drop the samples that cannot stay once a sample at a time is added."""
+        if self._count and not 0 <= timestamp - self._last_time <= _MAX_DELTA:
+            # The clock went backwards or the gap is too long to encode
+            self._start = 0
+            self._count = 0
+        elif self._count == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+            self._first_time += self._deltas[self._start]
+
+    def _append(self, timestamp: int, sample: tuple[int, ...]) -> None:
+        """Append a sample to a buffer with room for it."""
+        if not self._count:
+            self._first_time = timestamp
+        index = (self._start + self._count) % self.capacity
+        self._deltas[index] = timestamp - self._last_time if self._count else 0
+        for field, value in zip(self._fields, sample, strict=True):
+            field[index] = value
+        self._count += 1
+        self._last_time = timestamp
+
+    def _intervals(self, end: float) -> Iterator[tuple[int, float, float]]:
+        """Yield the array index, start and end time of each sample.
+
+        A sample lasts until the next one, and the newest until an end time.
+        """
+        timestamp = self._first_time / 1000
+        previous: int | None = None
+        for index in self._indexes():
+            if previous is not None:
+                next_timestamp = timestamp + self._deltas[index] / 1000
+                yield previous, timestamp, next_timestamp
+                timestamp = next_timestamp
+            previous = index
+        if previous is not None:
+            yield previous, timestamp, max(timestamp, end)
+
+    def listening_time(
+        self, start: float, end: float | None = None
+    ) -> tuple[dict[str | None, float], dict[str | None, float]]:
+        """Return the seconds played per playlist and per track within a window.
+
+        Playback before the oldest sample is unknown and not counted.
+        """
+        end = time.time() if end is None else end
+        playlists: dict[str | None, float] = {}
+        tracks: dict[str | None, float] = {}
+        states, _, playlist_codes, track_codes, _ = self._fields
+        for index, sample_start, sample_end in self._intervals(end):
+            if states[index] != _PLAYING:
+                continue
+            if (seconds := min(sample_end, end) - max(sample_start, start)) <= 0:
+                continue
+            playlist_id = self._strings[playlist_codes[index]]
+            track_id = self._strings[track_codes[index]]
+            playlists[playlist_id] = playlists.get(playlist_id, 0) + seconds
+            tracks[track_id] = tracks.get(track_id, 0) + seconds
+        return playlists, tracks
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the size of the history."""
+        return {
+            "samples": self._count,
+            "capacity": self.capacity,
+            "bytes": self.capacity * SAMPLE_BYTES,
+            "interned_ids": len(self._strings) - 1,
+            "oldest": self._first_time / 1000 if self._count else None,
+        }
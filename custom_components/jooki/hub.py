@@ -0,0 +1,217 @@
+"""Shared MQTT hub for all Jooki devices."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import heapq
+import logging
+
+from homeassistant.components import mqtt
+from homeassistant.components.mqtt.models import ReceiveMessage
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, PONG_TOPIC, STATE_TOPIC
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_HUB: HassKey["JookiHub"] = HassKey(f"{DOMAIN}_hub")
+
+# Topic suffixes the hub subscribes to for every device
+_SUFFIXES = (STATE_TOPIC, PONG_TOPIC)
+
+# Fraction of the heartbeat interval between consecutively registered devices.
+# The golden ratio spreads any number of devices evenly over the interval.
+_STAGGER_FRACTION = 0.6180339887
+
+MessageCallback = Callable[[ReceiveMessage], None]
+# Runs a device heartbeat and returns the delay in seconds until the next one
+HeartbeatCallback = Callable[[], Awaitable[float]]
+
+
+async def async_get_hub(hass: HomeAssistant) -> "JookiHub":
+    """Return the shared hub, starting it if needed."""
+    if (hub := hass.data.get(DATA_HUB)) is None:
+        hub = hass.data[DATA_HUB] = JookiHub(hass)
+        try:
+            await hub.async_start()
+        except Exception:
+            # Forget the hub, so the next setup starts it again
+            hass.data.pop(DATA_HUB, None)
+            raise
+    return hub
+
+
+class JookiHub:
+    """Route MQTT messages to Jooki coordinators and schedule their heartbeats.
+
+    Payloads are received as bytes, leaving decoding to the coordinators,
+    which do it outside the event loop for large states.
+
+    A single wildcard subscription per topic suffix serves every device whose
+    bridge prefix is one topic level. Messages are routed to the coordinator
+    registered for the prefix with a dictionary lookup. Devices with multi
+    level prefixes get exact subscriptions, which route the same way.
+
+    Heartbeats for all devices are driven by one timer, with devices staggered
+    across the interval instead of pinging in lockstep.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self._hass = hass
+        self._message_callbacks: dict[str, MessageCallback] = {}
+        self._heartbeats: dict[str, HeartbeatCallback] = {}
+        self._intervals: dict[str, float] = {}
+        self._unsubscribes: list[CALLBACK_TYPE] = []
+        self._prefix_unsubscribes: dict[str, list[CALLBACK_TYPE]] = {}
+        # Heap of (due time, registration number, prefix)
+        self._schedule: list[tuple[float, int, str]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._registration_ids: dict[str, int] = {}
+        self._registrations = 0
+
+    async def async_start(self) -> None:
+        """Subscribe to the wildcard topics for single level prefixes."""
+        _LOGGER.debug("Starting Jooki hub.")
+        results = await asyncio.gather(
+            *(
+                mqtt.async_subscribe(
+                    self._hass,
+                    f"+/{suffix}",
+                    self._async_message_received,
+                    encoding=None,
+                )
+                for suffix in _SUFFIXES
+            ),
+            return_exceptions=True,
+        )
+        self._unsubscribes = [
+            result for result in results if not isinstance(result, BaseException)
+        ]
+        for result in results:
+            if isinstance(result, BaseException):
+                # Drop the subscriptions that did succeed
+                self.async_stop()
+                raise result
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from all topics and stop scheduling heartbeats."""
+        _LOGGER.debug("Stopping Jooki hub.")
+        for unsubscribe in self._unsubscribes:
+            unsubscribe()
+        self._unsubscribes = []
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._schedule.clear()
+
+    async def async_register(
+        self,
+        prefix: str,
+        message_callback: MessageCallback,
+        heartbeat: HeartbeatCallback,
+        interval: float,
+    ) -> CALLBACK_TYPE:
+        """Register a device prefix and return a callback to unregister it."""
+        self._message_callbacks[prefix] = message_callback
+        self._heartbeats[prefix] = heartbeat
+        self._intervals[prefix] = interval
+        self._registration_ids[prefix] = registration_id = self._registrations
+        self._registrations += 1
+
+        if "/" in prefix:
+            self._prefix_unsubscribes[prefix] = list(
+                await asyncio.gather(
+                    *(
+                        mqtt.async_subscribe(
+                            self._hass,
+                            f"{prefix}/{suffix}",
+                            self._async_message_received,
+                            encoding=None,
+                        )
+                        for suffix in _SUFFIXES
+                    )
+                )
+            )
+
+        # Devices ask for their state and ping on their own when they start,
+        # so the first heartbeat comes after at least a full interval
+        offset = (1 + (registration_id * _STAGGER_FRACTION) % 1) * interval
+        self._async_schedule(prefix, registration_id, offset)
+
+        @callback
+        def unregister() -> None:
+            self._async_unregister(prefix)
+
+        return unregister
+
+    @callback
+    def _async_unregister(self, prefix: str) -> None:
+        """Remove a device prefix, stopping the hub when it was the last one."""
+        self._message_callbacks.pop(prefix, None)
+        self._heartbeats.pop(prefix, None)
+        self._intervals.pop(prefix, None)
+        self._registration_ids.pop(prefix, None)
+        for unsubscribe in self._prefix_unsubscribes.pop(prefix, ()):
+            unsubscribe()
+
+        if not self._message_callbacks:
+            self.async_stop()
+            self._hass.data.pop(DATA_HUB, None)
+
+    @callback
+    def _async_message_received(self, msg: ReceiveMessage) -> None:
+        """Route a message to the coordinator for its prefix."""
+        for suffix in _SUFFIXES:
+            if msg.topic.endswith(suffix):
+                prefix = msg.topic[: -len(suffix) - 1]
+                break
+        else:
+            return
+
+        if (message_callback := self._message_callbacks.get(prefix)) is not None:
+            message_callback(msg)
+
+    @callback
+    def _async_schedule(self, prefix: str, registration_id: int, delay: float) -> None:
+        """Schedule the next heartbeat for a registration of a prefix."""
+        heapq.heappush(
+            self._schedule, (self._hass.loop.time() + delay, registration_id, prefix)
+        )
+        self._async_arm_timer()
+
+    @callback
+    def _async_arm_timer(self) -> None:
+        """Point the timer at the earliest scheduled heartbeat."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._schedule:
+            self._timer = self._hass.loop.call_at(
+                self._schedule[0][0], self._async_run_due
+            )
+
+    @callback
+    def _async_run_due(self) -> None:
+        """Start every heartbeat that is due."""
+        self._timer = None
+        now = self._hass.loop.time()
+        while self._schedule and self._schedule[0][0] <= now:
+            _, registration_id, prefix = heapq.heappop(self._schedule)
+            # Skip entries left behind by a prefix that has been unregistered
+            if self._registration_ids.get(prefix) == registration_id:
+                self._hass.async_create_background_task(
+                    self._async_heartbeat(prefix, registration_id),
+                    name=f"Jooki heartbeat {prefix}",
+                )
+        self._async_arm_timer()
+
+    async def _async_heartbeat(self, prefix: str, registration_id: int) -> None:
+        """Run a heartbeat and schedule the next one."""
+        delay = self._intervals[prefix]
+        try:
+            delay = await self._heartbeats[prefix]()
+        finally:
+            if self._registration_ids.get(prefix) == registration_id:
+                self._async_schedule(prefix, registration_id, delay)
@@ -0,0 +1,84 @@
+"""Indexes over the Jooki device library."""
+
+from collections.abc import Callable
+from typing import Any
+
+PLAYLISTS_STATE_PATH = "db.playlists"
+TRACKS_STATE_PATH = "db.tracks"
+
+# Playlist that holds deleted tracks and is not offered as a source
+TRASH_PLAYLIST_ID = "TRASH"
+SPOTIFY_SOURCE = "SPOTIFY"
+
+
+def affects_path(changed: set[str], path: str) -> bool:
+    """Return if any changed path is at, above or below the given path."""
+    for changed_path in changed:
+        if (
+            changed_path == path
+            or changed_path.startswith(f"{path}.")
+            or path.startswith(f"{changed_path}.")
+        ):
+            return True
+    return False
+
+
+class JookiLibrary:
+    """Playlist lookups and the source list, rebuilt only when playlists change."""
+
+    def __init__(self, get_state: Callable[[str], Any]) -> None:
+        """Initialize the library with a state path getter."""
+        self._get_state = get_state
+        self._built = False
+        self._title_to_id: dict[str, str] = {}
+        self._id_to_title: dict[str, str] = {}
+        self._source_list: list[str] | None = None
+        # Incremented on every rebuild so renderers can cheaply detect changes
+        self.version = 0
+
+    def invalidate(self, changed: set[str]) -> None:
+        """Mark the indexes stale if the playlists changed."""
+        if self._built and affects_path(changed, PLAYLISTS_STATE_PATH):
+            self._built = False
+
+    def _ensure_built(self) -> None:
+        """Rebuild the indexes from the current playlists if they are stale."""
+        if self._built:
+            return
+
+        self._title_to_id = {}
+        self._id_to_title = {}
+        playlists = self._get_state(PLAYLISTS_STATE_PATH)
+        if playlists:
+            for playlist_id, playlist in playlists.items():
+                title = playlist.get("title")
+                if title is None:
+                    continue
+                self._id_to_title[playlist_id] = title
+                self._title_to_id.setdefault(title, playlist_id)
+            self._source_list = [
+                title
+                for playlist_id, title in self._id_to_title.items()
+                if playlist_id != TRASH_PLAYLIST_ID
+            ] + [SPOTIFY_SOURCE]
+        else:
+            self._source_list = None
+
+        self._built = True
+        self.version += 1
+
+    @property
+    def source_list(self) -> list[str] | None:
+        """Return the playlist titles offered as sources, or None without a library."""
+        self._ensure_built()
+        return self._source_list
+
+    def playlist_id(self, title: str) -> str | None:
+        """Return the id of the first playlist with a title."""
+        self._ensure_built()
+        return self._title_to_id.get(title)
+
+    def playlist_title(self, playlist_id: str | None) -> str | None:
+        """Return the title of a playlist."""
+        self._ensure_built()
+        return self._id_to_title.get(playlist_id) if playlist_id is not None else None
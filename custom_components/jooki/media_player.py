@@ -1,36 +1,152 @@
 """Media Player for Jooki."""
+from collections.abc import Callable
+from datetime import timedelta
 import logging
+from typing import Any
+
+import voluptuous as vol
 
 from homeassistant.components.media_player import (
+    BrowseMedia,
     MediaPlayerDeviceClass,
     MediaPlayerEntity,
+    SearchMedia,
+    SearchMediaQuery,
 )
 from homeassistant.components.media_player.const import (
+    ATTR_MEDIA_CONTENT_ID,
+    ATTR_MEDIA_DURATION,
+    ATTR_MEDIA_SEEK_POSITION,
+    ATTR_MEDIA_TRACK,
+    ATTR_MEDIA_VOLUME_LEVEL,
+    MediaClass,
     MediaPlayerEntityFeature,
     MediaPlayerState,
     MediaType,
 )
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import homeassistant.util.dt as dt_util
 
 from . import JookiConfigEntry
+from .artwork import async_get_artwork_cache
+from .browse_media import CONTENT_KINDS, PLAYLIST, TRACK, content_id, parse_content_id
 from .const import (
+    ATTR_COMMAND,
+    ATTR_DURATION,
+    ATTR_ERROR,
+    ATTR_LATENCY,
+    ATTR_PLAYLIST,
+    ATTR_SUCCESS,
+    ATTR_TIMEOUT,
+    ATTR_TRACK_INDEX,
+    ATTR_WAIT,
     DOMAIN,
+    GROUP_COMMAND_PAUSE,
+    GROUP_COMMAND_PLAY,
+    GROUP_COMMAND_PLAYLIST_PLAY,
+    GROUP_COMMAND_VOLUME_SET,
+    GROUP_COMMANDS,
     NEXT_TOPIC,
     OFF_TOPIC,
     PAUSE_TOPIC,
     PLAY_TOPIC,
+    PLAYBACK_STATE_PATH,
     PLAYLIST_PLAY_TOPIC,
+    POSITION_STATE_PATH,
     PREV_TOPIC,
     SEEK_TOPIC,
+    SERVICE_GET_LISTENING_TIME,
+    SERVICE_GROUP_COMMAND,
+    SERVICE_PLAY_PLAYLIST_AND_WAIT,
+    SERVICE_SEEK_AND_WAIT,
+    SERVICE_SET_VOLUME_AND_WAIT,
     VOL_TOPIC,
+    VOLUME_STATE_PATH,
 )
-from .coordinator import JookiCoordinator
+from .coordinator import COMMAND_TIMEOUT, JookiCoordinator
+from .entity import JookiEntity
+from .library import TRACKS_STATE_PATH
 
 _LOGGER = logging.getLogger(__name__)
 
+# Commands only publish, so group commands run on every entity at once
+PARALLEL_UPDATES = 0
+
+NOW_PLAYING_STATE_PATH = "audio.nowPlaying"
+# How far the reported position may be from a seek target to confirm it
+SEEK_TOLERANCE = 2000  # Milliseconds
+
+TIMEOUT_SCHEMA = vol.All(vol.Coerce(float), vol.Range(min=0.1, max=120))
+
+
+def _validate_group_command(data: dict[str, Any]) -> dict[str, Any]:
+    """Check that a group command has the arguments its command needs."""
+    command = data[ATTR_COMMAND]
+    if command == GROUP_COMMAND_VOLUME_SET and ATTR_MEDIA_VOLUME_LEVEL not in data:
+        raise vol.Invalid(f"{ATTR_MEDIA_VOLUME_LEVEL} is required for {command}")
+    if command == GROUP_COMMAND_PLAYLIST_PLAY and ATTR_PLAYLIST not in data:
+        raise vol.Invalid(f"{ATTR_PLAYLIST} is required for {command}")
+    return data
+
+
+GROUP_COMMAND_SCHEMA = vol.All(
+    cv.make_entity_service_schema(
+        {
+            vol.Required(ATTR_COMMAND): vol.In(GROUP_COMMANDS),
+            vol.Optional(ATTR_MEDIA_VOLUME_LEVEL): cv.small_float,
+            vol.Optional(ATTR_PLAYLIST): cv.string,
+            vol.Optional(ATTR_TRACK_INDEX, default=1): cv.positive_int,
+            vol.Optional(ATTR_WAIT, default=False): cv.boolean,
+            vol.Optional(ATTR_TIMEOUT, default=COMMAND_TIMEOUT): TIMEOUT_SCHEMA,
+        }
+    ),
+    _validate_group_command,
+)
+
+
+def _search_kinds(
+    media_type: MediaType | str | None,
+    media_classes: list[MediaClass] | None = None,
+) -> tuple[str, ...]:
+    """Return the kinds of library items to search for a media type or classes."""
+    kinds: set[str] = set()
+    if media_type == MediaType.PLAYLIST:
+        kinds.add(PLAYLIST)
+    elif media_type in (MediaType.TRACK, MediaType.MUSIC):
+        kinds.add(TRACK)
+    for media_class in media_classes or ():
+        if media_class == MediaClass.PLAYLIST:
+            kinds.add(PLAYLIST)
+        elif media_class in (MediaClass.TRACK, MediaClass.MUSIC):
+            kinds.add(TRACK)
+    return tuple(kinds) if kinds else (PLAYLIST, TRACK)
+
+
+def _equals(expected: Any) -> Callable[[Any], bool]:
+    """Return a check that a reported value is the expected one."""
+    return lambda reported: reported == expected
+
+
+def _plays_playlist(playlist_id: str) -> Callable[[Any], bool]:
+    """Return a check that the now playing state is from a playlist."""
+    return (
+        lambda now_playing: isinstance(now_playing, dict)
+        and now_playing.get("playlistId") == playlist_id
+    )
+
+
+def _by_time(seconds: dict[str | None, float]) -> list[tuple[str | None, float]]:
+    """Return ids with their listening time, longest first."""
+    return sorted(seconds.items(), key=lambda item: -item[1])
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -47,13 +163,67 @@ async def async_setup_entry(
         ],
     )
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_PLAY_PLAYLIST_AND_WAIT,
+        {
+            vol.Required(ATTR_PLAYLIST): cv.string,
+            vol.Optional(ATTR_TRACK_INDEX, default=1): cv.positive_int,
+            vol.Optional(ATTR_TIMEOUT, default=COMMAND_TIMEOUT): TIMEOUT_SCHEMA,
+        },
+        "async_play_playlist_and_wait",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        SERVICE_SEEK_AND_WAIT,
+        {
+            vol.Required(ATTR_MEDIA_SEEK_POSITION): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+            vol.Optional(ATTR_TIMEOUT, default=COMMAND_TIMEOUT): TIMEOUT_SCHEMA,
+        },
+        "async_seek_and_wait",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        SERVICE_SET_VOLUME_AND_WAIT,
+        {
+            vol.Required(ATTR_MEDIA_VOLUME_LEVEL): cv.small_float,
+            vol.Optional(ATTR_TIMEOUT, default=COMMAND_TIMEOUT): TIMEOUT_SCHEMA,
+        },
+        "async_set_volume_and_wait",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        SERVICE_GROUP_COMMAND,
+        GROUP_COMMAND_SCHEMA,
+        "async_group_command",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        SERVICE_GET_LISTENING_TIME,
+        {
+            vol.Optional(
+                ATTR_DURATION, default=timedelta(days=1)
+            ): cv.positive_time_period,
+        },
+        "async_get_listening_time",
+        supports_response=SupportsResponse.ONLY,
+    )
 
-class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
+
+class JookiMediaPlayer(JookiEntity, MediaPlayerEntity):
     """Representation of a Jooki media player device."""
 
+    # Media player entities already leave the source list and position out of
+    # the recorder. These change with every track and add nothing to history.
+    _unrecorded_attributes = frozenset(
+        {ATTR_MEDIA_CONTENT_ID, ATTR_MEDIA_DURATION, ATTR_MEDIA_TRACK}
+    )
+
     def __init__(self, name: str, coordinator: JookiCoordinator):
         """Initialize the media player."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, ("audio", "db.playlists"))
         self._attr_should_poll = False
 
         self._attr_name = name
@@ -70,6 +240,9 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
             | MediaPlayerEntityFeature.TURN_OFF
             | MediaPlayerEntityFeature.SEEK
             | MediaPlayerEntityFeature.SELECT_SOURCE
+            | MediaPlayerEntityFeature.BROWSE_MEDIA
+            | MediaPlayerEntityFeature.PLAY_MEDIA
+            | MediaPlayerEntityFeature.SEARCH_MEDIA
         )
 
         # self._attr_unique_id = __
@@ -79,12 +252,16 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
     @callback
     def _handle_coordinator_update(self):
         """Handle updated data from the coordinator."""
+        if self._is_position_drift():
+            return
+
         _LOGGER.debug("Updating data from coordinator: %s", self._attr_name)
+        previous_state = self._attr_state
         self._attr_available = self.coordinator.available
         _LOGGER.debug("Available %s: %s", self._attr_name, self._attr_available)
 
         playback_state = self.coordinator.get_state(
-            "audio.playback.state", "IDLE"
+            PLAYBACK_STATE_PATH, "IDLE"
         ).upper() if self._attr_available else "OFF"
         _LOGGER.debug(
             "Playback state value for %s: %s", self._attr_name, playback_state
@@ -124,15 +301,13 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
                 "audio.nowPlaying.playlistId"
             )
             # TODO: Figure out what this looks like if it's not an on device playlist
-            self._attr_media_playlist = self.coordinator.get_state(
-                f"db.playlists.{self._attr_media_content_id}.title"
+            self._attr_media_playlist = self.coordinator.library.playlist_title(
+                self._attr_media_content_id
             )
 
-            if image := self.coordinator.get_state("audio.nowPlaying.image"):
-                if image.startswith("http"):
-                    self._attr_media_image_url = image
-            else:
-                self._attr_media_image_url = None
+            self._attr_media_image_url = self._image_url(
+                self.coordinator.get_state("audio.nowPlaying.image")
+            )
 
             # Source is a playlist, probably maybe
             self._attr_source = self.coordinator.get_state(
@@ -144,27 +319,28 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
                 int(duration_ms / 1000) if duration_ms is not None else None
             )
 
-            position_ms = self.coordinator.get_state("audio.playback.position_ms")
+            position_ms = self.coordinator.get_state(POSITION_STATE_PATH)
             media_position = (
                 int(position_ms / 1000) if position_ms is not None else None
             )
 
-            if media_position != self._attr_media_position:
+            if self.coordinator.position_interpolation:
+                update_position = (
+                    previous_state != self._attr_state
+                    or self._position_needs_resync(media_position)
+                )
+            else:
+                update_position = media_position != self._attr_media_position
+
+            if update_position:
                 self._attr_media_position = media_position
                 self._attr_media_position_updated_at = dt_util.utcnow()
 
-            volume = self.coordinator.get_state("audio.config.volume")
+            volume = self.coordinator.get_state(VOLUME_STATE_PATH)
             self._attr_volume_level = volume / 100 if volume is not None else None
 
-            # TODO: Set sources by iterating over the playlists at self.coordinator.get_state("db.playlists")
-            # where key is ID and resulting dict contains a "title" key.
-            playlists = self.coordinator.get_state("db.playlists")
-            if playlists:
-                self._attr_source_list = [
-                    playlist["title"]
-                    for playlist_id, playlist in playlists.items()
-                    if playlist_id != "TRASH"
-                ] + ["SPOTIFY"]
+            if (source_list := self.coordinator.library.source_list) is not None:
+                self._attr_source_list = source_list
         else:
             # Not playing, so empty these out
             self._attr_media_title = None
@@ -180,14 +356,80 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
             self._attr_source = None
             self._attr_media_image_url = None
 
-        self.async_write_ha_state()
+        self._async_write_state_if_changed(
+            (
+                self._attr_available,
+                self._attr_state,
+                self._attr_media_title,
+                self._attr_media_artist,
+                self._attr_media_album_name,
+                self._attr_media_track,
+                self._attr_media_content_id,
+                self._attr_media_playlist,
+                self._attr_media_image_url,
+                self._attr_source,
+                self._attr_media_duration,
+                self._attr_media_position,
+                self._attr_media_position_updated_at,
+                self._attr_volume_level,
+                # The source list only changes when the library is rebuilt
+                self.coordinator.library.version,
+            )
+        )
+
+    def _image_url(self, image: str | None) -> str | None:
+        """Return the URL of an image, which the device may give as a path."""
+        if not image:
+            return None
+        if image.startswith("http"):
+            return image
+        if (host := self.coordinator.device_host) is not None:
+            return f"http://{host}/{image.lstrip('/')}"
+        return None
+
+    def _position_needs_resync(self, media_position: int | None) -> bool:
+        """Return if a reported position strays too far from the extrapolated one."""
+        if (
+            media_position is None
+            or self._attr_media_position is None
+            or self._attr_media_position_updated_at is None
+        ):
+            return media_position != self._attr_media_position
+
+        expected: float = self._attr_media_position
+        if self._attr_state == MediaPlayerState.PLAYING:
+            expected += (
+                dt_util.utcnow() - self._attr_media_position_updated_at
+            ).total_seconds()
+
+        return abs(media_position - expected) > self.coordinator.position_resync_threshold
+
+    def _is_position_drift(self) -> bool:
+        """Return if an update only moves the position along its extrapolation.
+
+        The frontend extrapolates the position from media_position_updated_at
+        while playing, so these updates do not need a state write.
+        """
+        if not (
+            self.coordinator.position_interpolation
+            and self.coordinator.changed_paths == {POSITION_STATE_PATH}
+            and self._attr_state == MediaPlayerState.PLAYING
+        ):
+            return False
+
+        position_ms = self.coordinator.get_state(POSITION_STATE_PATH)
+        return not self._position_needs_resync(
+            int(position_ms / 1000) if position_ms is not None else None
+        )
 
     async def async_media_play(self):
         """Send play command to the device."""
+        self.coordinator.async_set_optimistic(PLAYBACK_STATE_PATH, "PLAYING")
         await self.coordinator.async_publish(PLAY_TOPIC)
 
     async def async_media_pause(self):
         """Send pause command to the device."""
+        self.coordinator.async_set_optimistic(PLAYBACK_STATE_PATH, "PAUSED")
         await self.coordinator.async_publish(PAUSE_TOPIC)
 
     async def async_media_seek(self, position: float):
@@ -206,6 +448,7 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
     async def async_set_volume_level(self, volume):
         """Set volume level (0.0 to 1.0)."""
         volume_percent = int(volume * 100)
+        self.coordinator.async_set_optimistic(VOLUME_STATE_PATH, volume_percent)
         await self.coordinator.async_publish(VOL_TOPIC, {"vol": volume_percent})
 
     async def async_turn_off(self):
@@ -215,13 +458,229 @@ class JookiMediaPlayer(CoordinatorEntity[JookiCoordinator], MediaPlayerEntity):
     async def async_select_source(self, source: str):
         """Select input source."""
         _LOGGER.debug("Try setting source: %s", source)
-        playlists = self.coordinator.get_state("db.playlists")
-        if playlists:
-            for playlist_id, playlist in playlists.items():
-                _LOGGER.debug("comparing to %s", playlist["title"])
-                if playlist["title"] == source:
-                    await self.coordinator.async_publish(
-                        PLAYLIST_PLAY_TOPIC,
-                        {"playlistId": playlist_id, "trackIndex": 1},
-                    )
-                    break
+        if (playlist_id := self.coordinator.library.playlist_id(source)) is not None:
+            await self.coordinator.async_publish(
+                PLAYLIST_PLAY_TOPIC,
+                {"playlistId": playlist_id, "trackIndex": 1},
+            )
+
+    async def async_get_media_image(self) -> tuple[bytes | None, str | None]:
+        """Return the artwork of the current track from the shared cache."""
+        if (url := self.media_image_url) is None:
+            return None, None
+        return await async_get_artwork_cache(self.hass).async_get(
+            url, self._async_fetch_image
+        )
+
+    async def async_browse_media(
+        self,
+        media_content_type: MediaType | str | None = None,
+        media_content_id: str | None = None,
+    ) -> BrowseMedia:
+        """Return a page of the device library."""
+        return self.coordinator.media_browser.browse(media_content_id)
+
+    async def async_search_media(self, query: SearchMediaQuery) -> SearchMedia:
+        """Return the playlists and tracks best matching a query."""
+        kinds = _search_kinds(query.media_content_type, query.media_filter_classes)
+        browser = self.coordinator.media_browser
+        return SearchMedia(
+            result=[
+                browser.item(kind, key)
+                for kind, key in self.coordinator.search_index.search(
+                    query.search_query, kinds
+                )
+            ]
+        )
+
+    async def async_play_media(
+        self, media_type: MediaType | str, media_id: str, **kwargs: Any
+    ) -> None:
+        """Play a playlist, token or track from the media browser, or by name.
+
+        A media id that is not a content id of the media browser is looked up
+        by name, playing the best matching playlist or track.
+        """
+        browser = self.coordinator.media_browser
+        target: tuple[str, int] | None = None
+        if parse_content_id(media_id)[0] in CONTENT_KINDS:
+            target = browser.resolve_play(media_id)
+        elif matches := self.coordinator.search_index.search(
+            media_id, _search_kinds(media_type), limit=1
+        ):
+            target = browser.resolve_play(content_id(*matches[0]))
+        if target is None:
+            raise ServiceValidationError(f"Cannot play Jooki media: {media_id}")
+        playlist_id, track_index = target
+        await self.coordinator.async_publish(
+            PLAYLIST_PLAY_TOPIC,
+            {"playlistId": playlist_id, "trackIndex": track_index},
+        )
+
+    async def _async_command_and_wait(
+        self,
+        topic_suffix: str,
+        payload: dict[str, Any],
+        path: str,
+        check: Callable[[Any], bool],
+        timeout: float,
+    ) -> ServiceResponse:
+        """Send a command and return the latency until the device confirms it."""
+        try:
+            latency = await self.coordinator.async_command(
+                topic_suffix, payload, path, check, timeout
+            )
+        except TimeoutError as err:
+            raise HomeAssistantError(
+                f"{self.entity_id} did not confirm the command within {timeout} seconds"
+            ) from err
+        return {ATTR_LATENCY: latency}
+
+    def _resolve_playlist(self, playlist: str) -> str:
+        """Return the id of a playlist given by title or id."""
+        library = self.coordinator.library
+        if (playlist_id := library.playlist_id(playlist)) is not None:
+            return playlist_id
+        if library.playlist_title(playlist) is not None:
+            return playlist
+        raise ServiceValidationError(f"Unknown Jooki playlist: {playlist}")
+
+    async def async_play_playlist_and_wait(
+        self, playlist: str, track_index: int, timeout: float
+    ) -> ServiceResponse:
+        """Play a playlist, by title or id, and wait until the device plays it."""
+        playlist_id = self._resolve_playlist(playlist)
+        return await self._async_command_and_wait(
+            PLAYLIST_PLAY_TOPIC,
+            {"playlistId": playlist_id, "trackIndex": track_index},
+            NOW_PLAYING_STATE_PATH,
+            _plays_playlist(playlist_id),
+            timeout,
+        )
+
+    async def async_seek_and_wait(
+        self, seek_position: float, timeout: float
+    ) -> ServiceResponse:
+        """Seek and wait until the device reports the new position."""
+        position_ms = int(seek_position * 1000)
+        return await self._async_command_and_wait(
+            SEEK_TOPIC,
+            {"position_ms": position_ms},
+            POSITION_STATE_PATH,
+            lambda reported: isinstance(reported, int | float)
+            and abs(reported - position_ms) <= SEEK_TOLERANCE,
+            timeout,
+        )
+
+    async def async_set_volume_and_wait(
+        self, volume_level: float, timeout: float
+    ) -> ServiceResponse:
+        """Set the volume and wait until the device reports it."""
+        volume_percent = int(volume_level * 100)
+        self.coordinator.async_set_optimistic(VOLUME_STATE_PATH, volume_percent)
+        return await self._async_command_and_wait(
+            VOL_TOPIC,
+            {"vol": volume_percent},
+            VOLUME_STATE_PATH,
+            _equals(volume_percent),
+            timeout,
+        )
+
+    async def async_group_command(
+        self,
+        command: str,
+        *,
+        track_index: int,
+        wait: bool,
+        timeout: float,
+        volume_level: float = 0,
+        playlist: str = "",
+    ) -> ServiceResponse:
+        """Run the part of a group command for this device.
+
+        Entity services run every targeted entity concurrently, so a group
+        command takes a single round trip however many devices it targets.
+        Failures are reported in the response of the device instead of failing
+        the whole call. Shutdown has no state to wait for, so it never waits.
+        """
+        path: str | None = None
+        check: Callable[[Any], bool] | None = None
+        payload: dict[str, Any] | None = None
+        try:
+            if command == GROUP_COMMAND_PLAY:
+                self.coordinator.async_set_optimistic(PLAYBACK_STATE_PATH, "PLAYING")
+                topic, path = PLAY_TOPIC, PLAYBACK_STATE_PATH
+                check = _equals("PLAYING")
+            elif command == GROUP_COMMAND_PAUSE:
+                self.coordinator.async_set_optimistic(PLAYBACK_STATE_PATH, "PAUSED")
+                topic, path = PAUSE_TOPIC, PLAYBACK_STATE_PATH
+                check = _equals("PAUSED")
+            elif command == GROUP_COMMAND_VOLUME_SET:
+                volume_percent = int(volume_level * 100)
+                self.coordinator.async_set_optimistic(VOLUME_STATE_PATH, volume_percent)
+                topic, path = VOL_TOPIC, VOLUME_STATE_PATH
+                payload = {"vol": volume_percent}
+                check = _equals(volume_percent)
+            elif command == GROUP_COMMAND_PLAYLIST_PLAY:
+                playlist_id = self._resolve_playlist(playlist)
+                topic, path = PLAYLIST_PLAY_TOPIC, NOW_PLAYING_STATE_PATH
+                payload = {"playlistId": playlist_id, "trackIndex": track_index}
+                check = _plays_playlist(playlist_id)
+            else:
+                topic = OFF_TOPIC
+
+            if wait and path is not None and check is not None:
+                latency: float | None = await self.coordinator.async_command(
+                    topic, payload, path, check, timeout
+                )
+            else:
+                await self.coordinator.async_publish(topic, payload)
+                latency = None
+        except TimeoutError:
+            return {
+                ATTR_SUCCESS: False,
+                ATTR_ERROR: f"Not confirmed within {timeout} seconds",
+            }
+        except HomeAssistantError as err:
+            return {ATTR_SUCCESS: False, ATTR_ERROR: str(err)}
+        return {ATTR_SUCCESS: True, ATTR_LATENCY: latency}
+
+    async def async_get_listening_time(self, duration: timedelta) -> ServiceResponse:
+        """Return the time spent playing each playlist and track recently."""
+        end = dt_util.utcnow()
+        start = end - duration
+        playlists, tracks = self.coordinator.history.listening_time(
+            start.timestamp(), end.timestamp()
+        )
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "total": round(sum(playlists.values()), 1),
+            "playlists": [
+                {
+                    "id": playlist_id,
+                    "title": self.coordinator.library.playlist_title(playlist_id),
+                    "seconds": round(seconds, 1),
+                }
+                for playlist_id, seconds in _by_time(playlists)
+            ],
+            "tracks": [
+                {
+                    "id": track_id,
+                    "title": track.get("title"),
+                    "artist": track.get("artist"),
+                    "seconds": round(seconds, 1),
+                }
+                for track_id, seconds in _by_time(tracks)
+                for track in (self._library_track(track_id),)
+            ],
+        }
+
+    def _library_track(self, track_id: str | None) -> dict[str, Any]:
+        """Return a track of the library, or an empty one if it is unknown."""
+        track = (
+            self.coordinator.get_state(f"{TRACKS_STATE_PATH}.{track_id}")
+            if track_id is not None
+            else None
+        )
+        return track if isinstance(track, dict) else {}
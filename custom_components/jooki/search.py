@@ -0,0 +1,211 @@
+"""Search over the Jooki device library."""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+import difflib
+import re
+from typing import Any
+import unicodedata
+
+from .browse_media import PLAYLIST, TRACK
+from .library import (
+    PLAYLISTS_STATE_PATH,
+    TRACKS_STATE_PATH,
+    TRASH_PLAYLIST_ID,
+    affects_path,
+)
+
+# Fields whose words are indexed, per kind of item
+_INDEXED_FIELDS = {
+    PLAYLIST: ("title",),
+    TRACK: ("title", "artist", "album"),
+}
+_SECTIONS = {PLAYLIST: PLAYLISTS_STATE_PATH, TRACK: TRACKS_STATE_PATH}
+
+# Weights of a query word matching an indexed word exactly, as a prefix, or
+# only approximately
+_EXACT_WEIGHT = 1.0
+_PREFIX_WEIGHT = 0.8
+_FUZZY_WEIGHT = 0.6
+_FUZZY_CUTOFF = 0.75
+_FUZZY_MATCHES = 3
+# Bonus for items whose title is the whole query
+_TITLE_WEIGHT = 10.0
+
+_WORD = re.compile(r"\w+")
+
+Item = tuple[str, str]
+
+
+def normalize(text: str) -> str:
+    """Return text case folded and without accents."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list[str]:
+    """Return the normalized words of a text."""
+    return _WORD.findall(normalize(text))
+
+
+class JookiSearchIndex:
+    """Inverted index from words to the playlists and tracks containing them.
+
+    The index is built on the first search and then kept up to date from the
+    changed paths of each state message, re-indexing only the changed items.
+    Queries match indexed words exactly, by prefix or approximately.
+    """
+
+    def __init__(self, get_state: Callable[[str], Any]) -> None:
+        """Initialize an empty index with a state path getter."""
+        self._get_state = get_state
+        self._built = False
+        self._postings: dict[str, set[Item]] = {}
+        self._item_words: dict[Item, frozenset[str]] = {}
+        # Titles as their normalized words joined by spaces
+        self._titles: dict[Item, str] = {}
+        # Sorted words for prefix lookups, rebuilt when words come or go
+        self._vocabulary: list[str] | None = None
+
+    def _section(self, path: str) -> dict[str, Any]:
+        """Return a section of the library, or an empty one."""
+        section = self._get_state(path)
+        return section if isinstance(section, dict) else {}
+
+    def update(self, changed: set[str]) -> None:
+        """Re-index the playlists and tracks touched by the changed paths."""
+        if not self._built or not affects_path(changed, "db"):
+            return
+
+        for kind, path in _SECTIONS.items():
+            section = self._section(path)
+            item_ids = self._changed_ids(changed, path)
+            if item_ids is None:
+                # The whole section changed, so compare every item
+                item_ids = set(section).union(
+                    item_id
+                    for item_kind, item_id in self._item_words
+                    if item_kind == kind
+                )
+            for item_id in item_ids:
+                self._index((kind, item_id), section.get(item_id))
+
+    @staticmethod
+    def _changed_ids(changed: set[str], path: str) -> set[str] | None:
+        """Return the ids of the changed items of a section, or None if all."""
+        prefix = f"{path}."
+        item_ids = set()
+        for changed_path in changed:
+            if changed_path.startswith(prefix):
+                item_ids.add(changed_path[len(prefix) :].partition(".")[0])
+            elif changed_path == path or path.startswith(f"{changed_path}."):
+                return None
+        return item_ids
+
+    def _build(self) -> None:
+        """Index the whole library."""
+        self._postings.clear()
+        self._item_words.clear()
+        self._titles.clear()
+        self._vocabulary = None
+        for kind, path in _SECTIONS.items():
+            for item_id, item in self._section(path).items():
+                self._index((kind, item_id), item)
+        self._built = True
+
+    def _index(self, key: Item, item: Any) -> None:
+        """Replace the words indexed for an item, removing it if it is gone."""
+        words: frozenset[str] = frozenset()
+        if isinstance(item, dict) and key[1] != TRASH_PLAYLIST_ID:
+            words = frozenset(
+                word
+                for field in _INDEXED_FIELDS[key[0]]
+                if isinstance(value := item.get(field), str)
+                for word in tokenize(value)
+            )
+            self._titles[key] = " ".join(tokenize(str(item.get("title") or "")))
+        else:
+            self._titles.pop(key, None)
+
+        old_words = self._item_words.pop(key, frozenset())
+        if words:
+            self._item_words[key] = words
+        for word in old_words - words:
+            postings = self._postings[word]
+            postings.discard(key)
+            if not postings:
+                del self._postings[word]
+                self._vocabulary = None
+        for word in words - old_words:
+            if (postings := self._postings.get(word)) is None:
+                postings = self._postings[word] = set()
+                self._vocabulary = None
+            postings.add(key)
+
+    def _expand(self, word: str) -> dict[str, float]:
+        """Return the indexed words matching a query word, with their weights."""
+        matches: dict[str, float] = {}
+        if word in self._postings:
+            matches[word] = _EXACT_WEIGHT
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        index = bisect_left(self._vocabulary, word)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(
+            word
+        ):
+            matches.setdefault(self._vocabulary[index], _PREFIX_WEIGHT)
+            index += 1
+
+        if not matches:
+            for close in difflib.get_close_matches(
+                word, self._vocabulary, _FUZZY_MATCHES, _FUZZY_CUTOFF
+            ):
+                matches[close] = _FUZZY_WEIGHT
+        return matches
+
+    def search(
+        self, query: str, kinds: Iterable[str] = (PLAYLIST, TRACK), limit: int = 50
+    ) -> list[Item]:
+        """Return the best matching items of kinds, best first.
+
+        Items matching every word of the query rank first. If there are none,
+        items matching any word are returned instead.
+        """
+        if not self._built:
+            self._build()
+        if not (words := tokenize(query)):
+            return []
+
+        wanted = set(kinds)
+        scores: dict[Item, float] = {}
+        matched_words: dict[Item, int] = {}
+        for word in dict.fromkeys(words):
+            best: dict[Item, float] = {}
+            for match, weight in self._expand(word).items():
+                for key in self._postings[match]:
+                    if key[0] in wanted and weight > best.get(key, 0):
+                        best[key] = weight
+            for key, weight in best.items():
+                scores[key] = scores.get(key, 0) + weight
+                matched_words[key] = matched_words.get(key, 0) + 1
+
+        if not scores:
+            return []
+        unique_words = len(set(words))
+        if any(count == unique_words for count in matched_words.values()):
+            scores = {
+                key: score
+                for key, score in scores.items()
+                if matched_words[key] == unique_words
+            }
+
+        normalized_query = " ".join(words)
+        for key in scores:
+            if self._titles.get(key) == normalized_query:
+                scores[key] += _TITLE_WEIGHT
+
+        ranked = sorted(
+            scores, key=lambda key: (-scores[key], self._titles.get(key, ""), key)
+        )
+        return ranked[:limit]
@@ -0,0 +1,125 @@
+"""Diagnostic sensors for Jooki."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import logging
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import JookiConfigEntry
+from .const import DOMAIN
+from .coordinator import JookiCoordinator
+from .entity import JookiEntity
+from .stats import JookiStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Statistics are kept in memory and change continuously, so they are polled
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class JookiSensorEntityDescription(SensorEntityDescription):
+    """Describes a Jooki statistics sensor."""
+
+    value_fn: Callable[[JookiStats], float | int | None]
+
+
+SENSORS: tuple[JookiSensorEntityDescription, ...] = (
+    JookiSensorEntityDescription(
+        key="ping_rtt",
+        name="Jooki Ping Round Trip Time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda stats: stats.rtt_last,
+    ),
+    JookiSensorEntityDescription(
+        key="ping_rtt_p50",
+        name="Jooki Ping Round Trip Time Median",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda stats: stats.rtt_p50,
+    ),
+    JookiSensorEntityDescription(
+        key="ping_rtt_p95",
+        name="Jooki Ping Round Trip Time 95th Percentile",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda stats: stats.rtt_p95,
+    ),
+    JookiSensorEntityDescription(
+        key="state_messages_per_minute",
+        name="Jooki State Messages Per Minute",
+        native_unit_of_measurement="messages/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: stats.state_messages_per_minute,
+    ),
+    JookiSensorEntityDescription(
+        key="average_payload_size",
+        name="Jooki Average State Payload Size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda stats: stats.average_payload_size,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: JookiConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Jooki sensors."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        JookiStatsSensor(coordinator, description) for description in SENSORS
+    )
+
+
+class JookiStatsSensor(JookiEntity, SensorEntity):
+    """Diagnostic sensor reporting link statistics for a Jooki."""
+
+    entity_description: JookiSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: JookiCoordinator,
+        description: JookiSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
+        # No state paths, since the statistics are polled instead
+        super().__init__(coordinator, ())
+        self.entity_description = description
+
+        _LOGGER.debug("Initialized sensor: %s", description.name)
+
+    @property
+    def should_poll(self) -> bool:
+        """Poll the in-memory statistics."""
+        return True
+
+    async def async_update(self) -> None:
+        """Statistics are read when the state is written, so there is nothing to fetch."""
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the statistic."""
+        return self.entity_description.value_fn(self.coordinator.stats)
@@ -0,0 +1,170 @@
+"""Link statistics for Jooki devices."""
+
+from collections import Counter, deque
+import math
+import time
+from typing import Any
+
+RTT_SAMPLES = 50
+PAYLOAD_SAMPLES = 100
+RATE_WINDOW = 60.0  # Seconds
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Return the nearest rank percentile of values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class JookiStats:
+    """Rolling ping round trip times and state message statistics."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._ping_sent: float | None = None
+        self._rtts: deque[float] = deque(maxlen=RTT_SAMPLES)
+        self._state_times: deque[float] = deque()
+        self._payload_sizes: deque[int] = deque(maxlen=PAYLOAD_SAMPLES)
+        self._payload_total = 0
+
+    def ping_sent(self) -> None:
+        """Record that a ping was sent."""
+        self._ping_sent = time.monotonic()
+
+    def pong_received(self) -> None:
+        """Record a pong, measuring the round trip from the latest ping."""
+        if self._ping_sent is not None:
+            self._rtts.append(time.monotonic() - self._ping_sent)
+            self._ping_sent = None
+
+    def state_received(self, size: int) -> None:
+        """Record a state message of the given payload size."""
+        now = time.monotonic()
+        self._state_times.append(now)
+        self._prune(now)
+
+        if len(self._payload_sizes) == self._payload_sizes.maxlen:
+            self._payload_total -= self._payload_sizes[0]
+        self._payload_sizes.append(size)
+        self._payload_total += size
+
+    def _prune(self, now: float) -> None:
+        """Drop state message times older than the rate window."""
+        while self._state_times and self._state_times[0] < now - RATE_WINDOW:
+            self._state_times.popleft()
+
+    @property
+    def rtt_last(self) -> float | None:
+        """Return the last ping round trip time in milliseconds."""
+        return self._rtts[-1] * 1000 if self._rtts else None
+
+    @property
+    def rtt_p50(self) -> float | None:
+        """Return the median ping round trip time in milliseconds."""
+        value = percentile(list(self._rtts), 0.5)
+        return value * 1000 if value is not None else None
+
+    @property
+    def rtt_p95(self) -> float | None:
+        """Return the 95th percentile ping round trip time in milliseconds."""
+        value = percentile(list(self._rtts), 0.95)
+        return value * 1000 if value is not None else None
+
+    @property
+    def state_messages_per_minute(self) -> int:
+        """Return the number of state messages received in the last minute."""
+        self._prune(time.monotonic())
+        return len(self._state_times)
+
+    @property
+    def average_payload_size(self) -> float | None:
+        """Return the average size in bytes of recent state payloads."""
+        if not self._payload_sizes:
+            return None
+        return self._payload_total / len(self._payload_sizes)
+
+    def as_dict(self) -> dict[str, float | int | None]:
+        """Return all statistics."""
+        return {
+            "rtt_last_ms": self.rtt_last,
+            "rtt_p50_ms": self.rtt_p50,
+            "rtt_p95_ms": self.rtt_p95,
+            "state_messages_per_minute": self.state_messages_per_minute,
+            "average_payload_size": self.average_payload_size,
+        }
+
+
+class Timing:
+    """Accumulated durations of a timed operation."""
+
+    __slots__ = ("count", "max", "total")
+
+    def __init__(self) -> None:
+        """Initialize an empty timing."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record one duration."""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict[str, float | int]:
+        """Return the timing in milliseconds."""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+
+
+class JookiCounters:
+    """Counters for the hot paths of the coordinator and its entities."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.timings: dict[str, Timing] = {}
+        self.entity_timings: dict[str, Timing] = {}
+        self.changed_paths: Counter[str] = Counter()
+        self.state_writes: Counter[str] = Counter()
+        # Entity updates that rendered the same values as the last write
+        self.state_writes_skipped = 0
+        # Listener callbacks run, and skipped because their paths did not change
+        self.notifications_dispatched = 0
+        self.notifications_suppressed = 0
+        # State messages dropped before dispatch, and merged into a pending one
+        self.messages_unchanged = 0
+        self.messages_coalesced = 0
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        """Record the duration of a coordinator operation."""
+        if (timing := self.timings.get(name)) is None:
+            timing = self.timings[name] = Timing()
+        timing.add(seconds)
+
+    def add_entity_timing(self, entity_id: str, seconds: float) -> None:
+        """Record the duration of an entity update."""
+        if (timing := self.entity_timings.get(entity_id)) is None:
+            timing = self.entity_timings[entity_id] = Timing()
+        timing.add(seconds)
+
+    def as_dict(self, top_paths: int = 25) -> dict[str, Any]:
+        """Return the counters, limited to the most frequently changed paths."""
+        return {
+            "timings": {name: t.as_dict() for name, t in self.timings.items()},
+            "entity_updates": {
+                entity_id: t.as_dict() for entity_id, t in self.entity_timings.items()
+            },
+            "state_writes": dict(self.state_writes),
+            "state_writes_skipped": self.state_writes_skipped,
+            "notifications_dispatched": self.notifications_dispatched,
+            "notifications_suppressed": self.notifications_suppressed,
+            "messages_unchanged": self.messages_unchanged,
+            "messages_coalesced": self.messages_coalesced,
+            "changed_paths": dict(self.changed_paths.most_common(top_paths)),
+        }
@@ -4,11 +4,12 @@ import logging
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.json import json_dumps
 
 from . import JookiConfigEntry
 from .const import DOMAIN, TOY_SAFE_TOPIC
 from .coordinator import JookiCoordinator
+from .entity import JookiEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,7 +34,7 @@ async def async_setup_entry(
     )
 
 
-class JookiSwitch(CoordinatorEntity[JookiCoordinator], SwitchEntity):
+class JookiSwitch(JookiEntity, SwitchEntity):
     """Representation of a Jooki switch device."""
 
     def __init__(
@@ -46,15 +47,16 @@ class JookiSwitch(CoordinatorEntity[JookiCoordinator], SwitchEntity):
         turn_off: dict,
     ):
         """Initialize the switch."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, (state_attr,))
         self._attr_should_poll = False
 
         self._attr_name = name
         self._attr_available = False
         self._state_attr = state_attr
         self._write_topic = write_topic
-        self._turn_on_data = turn_on
-        self._turn_off_data = turn_off
+        # Serialized once, since the payloads never change
+        self._turn_on_data = json_dumps(turn_on)
+        self._turn_off_data = json_dumps(turn_off)
 
         # self._attr_unique_id = __
         # self._attr_device_info = DeviceInfo()
@@ -65,15 +67,15 @@ class JookiSwitch(CoordinatorEntity[JookiCoordinator], SwitchEntity):
         """Handle updated data from the coordinator."""
         self._attr_available = self.coordinator.available
 
-        is_on = self.coordinator.get_state(self._state_attr)
-        if self._attr_is_on != is_on:
-            self._attr_is_on = is_on
-            self.async_write_ha_state()
+        self._attr_is_on = self.coordinator.get_state(self._state_attr)
+        self._async_write_state_if_changed((self._attr_available, self._attr_is_on))
 
     async def async_turn_on(self):
         """Turn on switch."""
+        self.coordinator.async_set_optimistic(self._state_attr, True)
         await self.coordinator.async_publish(self._write_topic, self._turn_on_data)
 
     async def async_turn_off(self):
         """Turn off switch."""
+        self.coordinator.async_set_optimistic(self._state_attr, False)
         await self.coordinator.async_publish(self._write_topic, self._turn_off_data)
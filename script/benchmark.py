@@ -0,0 +1,318 @@
+"""Benchmark the Jooki state hot path by replaying state streams.
+
+Replays recorded or synthetic `/j/web/output/state` payloads through
+`parse_state`, `merge_data`, `JookiCoordinator._mqtt_message_received` and
+`JookiMediaPlayer._handle_coordinator_update`, using a local stand-in for
+`hass` and MQTT. Home Assistant must be installed.
+
+Run from the repository root:
+
+    python -m script.benchmark
+    python -m script.benchmark --tracks 5000 --scenario db_dump
+    python -m script.benchmark --replay recorded_states.jsonl
+
+A recording is a file with one state payload per line.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from custom_components.jooki.const import (
+    CONF_COALESCE_WINDOW,
+    CONF_EXECUTOR_THRESHOLD,
+    STATE_TOPIC,
+)
+from custom_components.jooki.coordinator import (
+    JookiCoordinator,
+    merge_data,
+    parse_state,
+)
+from custom_components.jooki.media_player import JookiMediaPlayer
+from custom_components.jooki.stats import percentile
+
+from .fixtures import full_state, synthetic_db
+
+PREFIX = "bench"
+
+
+class StubHass:
+    """Minimal stand-in for Home Assistant, enough to drive the coordinator."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the stub on a running loop."""
+        self.loop = loop
+        self.data: dict[str, Any] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def async_create_task(self, target, name=None, eager_start=True):
+        """Schedule a coroutine, keeping a reference until it is done."""
+        task = self.loop.create_task(target, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async_create_background_task = async_create_task
+
+    def async_add_executor_job(self, target, *args):
+        """Run a function in the default executor."""
+        return self.loop.run_in_executor(None, target, *args)
+
+    async def async_block_till_done(self) -> None:
+        """Wait for all scheduled tasks."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+
+async def _stub_publish(hass, topic, payload, *args, **kwargs) -> None:
+    """Drop published messages."""
+
+
+# Synthetic state streams
+
+
+def position_ticks(count: int) -> Iterator[bytes]:
+    """Yield a playing state, then position-only updates, one per second."""
+    yield json.dumps(full_state(synthetic_db(10, 1))).encode()
+    for i in range(1, count):
+        yield json.dumps({"audio": {"playback": {"position_ms": i * 1000}}}).encode()
+
+
+def db_dumps(count: int, tracks: int, playlists: int) -> Iterator[bytes]:
+    """Yield full state dumps, alternating small edits and identical re-sends."""
+    db = synthetic_db(tracks, playlists)
+    payload = b""
+    for i in range(count):
+        if not i % 2:
+            db["tracks"]["track000000"]["title"] = f"Track 0 edit {i}"
+            payload = json.dumps(full_state(db, position_ms=i * 1000)).encode()
+        yield payload
+
+
+def bursty(count: int, tracks: int, playlists: int) -> Iterator[bytes]:
+    """Yield a full dump followed by bursts of mixed playback changes."""
+    rng = random.Random(1)
+    yield json.dumps(full_state(synthetic_db(tracks, playlists))).encode()
+    for i in range(count - 1):
+        message: dict[str, Any] = {"audio": {"playback": {"position_ms": i * 250}}}
+        if rng.random() < 0.2:
+            message["audio"]["config"] = {"volume": rng.randint(0, 100)}
+        if rng.random() < 0.05:
+            message["audio"]["nowPlaying"] = {
+                "track": f"Track {i}",
+                "queueIndex": i,
+                "duration_ms": 180_000,
+            }
+        if rng.random() < 0.02:
+            message["audio"]["playback"]["state"] = rng.choice(["PLAYING", "PAUSED"])
+        yield json.dumps(message).encode()
+
+
+def replay(path: Path) -> Iterator[bytes]:
+    """Yield the payloads of a recording."""
+    with path.open("rb") as recording:
+        for line in recording:
+            if line := line.strip():
+                yield line
+
+
+# Measurement
+
+
+@dataclass
+class Result:
+    """Measurements for one stage of one scenario."""
+
+    stage: str
+    messages: int
+    latencies: list[float]
+    allocated: int | None = None
+
+    def row(self) -> str:
+        """Return the result as a table row."""
+        total = sum(self.latencies)
+        ordered = sorted(self.latencies)
+        p95 = percentile(ordered, 0.95) or 0.0
+        allocated = (
+            f"{self.allocated / max(self.messages, 1):.0f}"
+            if self.allocated is not None
+            else "-"
+        )
+        return (
+            f"{self.stage:<16} {self.messages:>8} "
+            f"{self.messages / total if total else 0:>12.0f} "
+            f"{statistics.median(ordered) * 1e6 if ordered else 0:>10.1f} "
+            f"{p95 * 1e6:>10.1f} "
+            f"{max(ordered, default=0) * 1e6:>10.1f} "
+            f"{allocated:>12}"
+        )
+
+
+HEADER = (
+    f"{'stage':<16} {'messages':>8} {'msgs/s':>12} {'p50 us':>10} "
+    f"{'p95 us':>10} {'max us':>10} {'alloc B/msg':>12}"
+)
+
+
+def measure_allocations(run: Callable[[], Any]) -> int:
+    """Return the bytes allocated while running a function."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def bench_parse(payloads: list[bytes]) -> Result:
+    """Benchmark parse_state."""
+    latencies = []
+    for payload in payloads:
+        start = time.perf_counter()
+        parse_state(payload)
+        latencies.append(time.perf_counter() - start)
+    allocated = measure_allocations(lambda: [parse_state(p) for p in payloads])
+    return Result("parse_state", len(payloads), latencies, allocated)
+
+
+def bench_merge(payloads: list[bytes]) -> Result:
+    """Benchmark merge_data over already parsed messages."""
+    messages = [parse_state(payload) for payload in payloads]
+
+    def run(latencies: list[float] | None = None) -> None:
+        data: dict[str, Any] = {}
+        for message in messages:
+            start = time.perf_counter()
+            merge_data(data, message)
+            if latencies is not None:
+                latencies.append(time.perf_counter() - start)
+
+    latencies: list[float] = []
+    run(latencies)
+    # Messages are merged into fresh dictionaries, so parse them again
+    messages = [parse_state(payload) for payload in payloads]
+    return Result("merge_data", len(payloads), latencies, measure_allocations(run))
+
+
+async def bench_coordinator(
+    payloads: list[bytes], options: dict[str, Any]
+) -> tuple[Result, Result, JookiCoordinator]:
+    """Benchmark message handling with the media player attached."""
+    hass = StubHass(asyncio.get_running_loop())
+    coordinator = JookiCoordinator(hass, PREFIX, options)
+    player = JookiMediaPlayer("Bench Player", coordinator)
+    player.hass = hass
+    player.entity_id = "media_player.bench"
+
+    entity_latencies: list[float] = []
+    handle_update = player._handle_coordinator_update  # noqa: SLF001
+
+    def timed_update() -> None:
+        start = time.perf_counter()
+        handle_update()
+        entity_latencies.append(time.perf_counter() - start)
+
+    writes = 0
+
+    def count_write() -> None:
+        nonlocal writes
+        writes += 1
+
+    player.async_write_ha_state = count_write
+    coordinator.async_add_listener(timed_update, player.coordinator_context)
+
+    latencies: list[float] = []
+    topic = f"{PREFIX}/{STATE_TOPIC}"
+    for payload in payloads:
+        msg = SimpleNamespace(topic=topic, payload=payload)
+        start = time.perf_counter()
+        coordinator._mqtt_message_received(msg)  # noqa: SLF001
+        await hass.async_block_till_done()
+        latencies.append(time.perf_counter() - start)
+
+    print(f"  entity state writes: {writes}")
+    return (
+        Result("coordinator", len(payloads), latencies),
+        Result("entity_update", len(entity_latencies), entity_latencies),
+        coordinator,
+    )
+
+
+SCENARIOS: dict[str, Callable[[argparse.Namespace], Iterator[bytes]]] = {
+    "position": lambda args: position_ticks(args.messages),
+    "db_dump": lambda args: db_dumps(
+        max(2, args.messages // 100), args.tracks, args.playlists
+    ),
+    "bursty": lambda args: bursty(args.messages, args.tracks, args.playlists),
+}
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the selected scenarios and print the results."""
+    if args.replay:
+        streams = {args.replay.name: lambda _: replay(args.replay)}
+    elif args.scenario == "all":
+        streams = SCENARIOS
+    else:
+        streams = {args.scenario: SCENARIOS[args.scenario]}
+
+    options = {
+        CONF_COALESCE_WINDOW: args.coalesce_window,
+        CONF_EXECUTOR_THRESHOLD: args.executor_threshold,
+    }
+    with patch("homeassistant.components.mqtt.async_publish", _stub_publish):
+        for name, stream in streams.items():
+            payloads = list(stream(args))
+            size = sum(len(payload) for payload in payloads)
+            print(f"\n{name}: {len(payloads)} messages, {size / 1024:.0f} KiB")
+            coordinator_result, entity_result, coordinator = await bench_coordinator(
+                payloads, options
+            )
+            print(HEADER)
+            print(bench_parse(payloads).row())
+            print(bench_merge(payloads).row())
+            print(coordinator_result.row())
+            print(entity_result.row())
+            if args.verbose:
+                print(json.dumps(coordinator.counters.as_dict(top_paths=5), indent=2))
+
+
+def main() -> int:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        choices=[*SCENARIOS, "all"],
+        default="all",
+        help="stream to replay",
+    )
+    parser.add_argument("--replay", type=Path, help="recorded payloads, one per line")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--playlists", type=int, default=50)
+    parser.add_argument(
+        "--coalesce-window",
+        type=float,
+        default=0,
+        help="seconds; 0 dispatches every message so each is measured",
+    )
+    parser.add_argument("--executor-threshold", type=int, default=32768)
+    parser.add_argument("--verbose", action="store_true", help="print counters")
+    asyncio.run(run(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Synthetic Jooki device state shared by the development scripts.
+
+Kept free of Home Assistant imports so the simulator can run without it.
+"""
+
+import random
+from typing import Any
+
+
+def synthetic_db(tracks: int, playlists: int) -> dict[str, Any]:
+    """Return a device library with the given number of tracks and playlists."""
+    rng = random.Random(0)
+    track_ids = [f"track{i:06d}" for i in range(tracks)]
+    return {
+        "tracks": {
+            track_id: {
+                "title": f"Track {i}",
+                "artist": f"Artist {i % 97}",
+                "album": f"Album {i % 311}",
+                "duration_ms": rng.randint(60_000, 400_000),
+            }
+            for i, track_id in enumerate(track_ids)
+        },
+        "playlists": {
+            f"playlist{p:04d}": {
+                "title": f"Playlist {p}",
+                "tracks": track_ids[p::playlists],
+            }
+            for p in range(playlists)
+        },
+    }
+
+
+def full_state(db: dict[str, Any], position_ms: int = 0) -> dict[str, Any]:
+    """Return a full device state around a library."""
+    return {
+        "audio": {
+            "playback": {"state": "PLAYING", "position_ms": position_ms},
+            "nowPlaying": {
+                "track": "Track 0",
+                "artist": "Artist 0",
+                "album": "Album 0",
+                "queueIndex": 0,
+                "playlistId": "playlist0000",
+                "source": "Playlist 0",
+                "duration_ms": 180_000,
+                "image": "http://example.invalid/art.jpg",
+            },
+            "config": {"volume": 40},
+        },
+        "device": {"toy_safe": False},
+        "db": db,
+    }
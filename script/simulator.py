@@ -0,0 +1,603 @@
+"""Simulate Jooki devices for load and soak testing.
+
+Every simulated device behaves like a Jooki under its own bridge prefix: it
+answers pings and state requests, applies playback commands and streams
+`position_ms` ticks while playing. Devices connect to an MQTT broker with
+paho-mqtt, or run in-process against Jooki coordinators through a local
+stand-in for the broker, which needs Home Assistant installed.
+
+Run from the repository root:
+
+    python -m script.simulator --count 200 --host localhost
+    python -m script.simulator --local --count 200 --duration 300
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from collections.abc import Callable
+import contextlib
+import json
+from pathlib import Path
+import random
+import runpy
+import sys
+import time
+from typing import Any
+
+from .fixtures import full_state, synthetic_db
+
+# Load the topics without importing the integration, which needs Home Assistant
+_CONST = runpy.run_path(
+    str(Path(__file__).parents[1] / "custom_components" / "jooki" / "const.py")
+)
+PING_TOPIC: str = _CONST["PING_TOPIC"]
+PONG_TOPIC: str = _CONST["PONG_TOPIC"]
+STATE_TOPIC: str = _CONST["STATE_TOPIC"]
+GET_STATE_TOPIC: str = _CONST["GET_STATE_TOPIC"]
+PLAY_TOPIC: str = _CONST["PLAY_TOPIC"]
+PAUSE_TOPIC: str = _CONST["PAUSE_TOPIC"]
+SEEK_TOPIC: str = _CONST["SEEK_TOPIC"]
+PREV_TOPIC: str = _CONST["PREV_TOPIC"]
+NEXT_TOPIC: str = _CONST["NEXT_TOPIC"]
+VOL_TOPIC: str = _CONST["VOL_TOPIC"]
+OFF_TOPIC: str = _CONST["OFF_TOPIC"]
+PLAYLIST_PLAY_TOPIC: str = _CONST["PLAYLIST_PLAY_TOPIC"]
+TOY_SAFE_TOPIC: str = _CONST["TOY_SAFE_TOPIC"]
+
+# Topic suffixes a device listens on
+INPUT_SUFFIX = GET_STATE_TOPIC.rsplit("/", 1)[0] + "/+"
+
+MessageCallback = Callable[[str, str], None]
+
+
+# Transports
+
+
+class TopicRouter:
+    """Match topics against MQTT topic filters with `+` and `#` wildcards.
+
+    Filters are indexed by their first level, so routing a message only
+    scans the filters that can match it and those starting with a wildcard.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty router."""
+        self._by_first_level: dict[str, list[tuple[list[str], MessageCallback]]] = {}
+        self._wildcards: list[tuple[list[str], MessageCallback]] = []
+
+    def add(self, topic_filter: str, callback: MessageCallback) -> Callable[[], None]:
+        """Add a filter and return a function that removes it."""
+        levels = topic_filter.split("/")
+        entry = (levels, callback)
+        if levels[0] in ("+", "#"):
+            bucket = self._wildcards
+        else:
+            bucket = self._by_first_level.setdefault(levels[0], [])
+        bucket.append(entry)
+        return lambda: bucket.remove(entry)
+
+    def match(self, topic: str) -> list[MessageCallback]:
+        """Return the callbacks of every filter that matches a topic."""
+        levels = topic.split("/")
+        candidates = self._by_first_level.get(levels[0], [])
+        return [
+            callback
+            for filter_levels, callback in [*candidates, *self._wildcards]
+            if _matches(filter_levels, levels)
+        ]
+
+
+def _matches(filter_levels: list[str], levels: list[str]) -> bool:
+    """Return if topic levels match the levels of a topic filter."""
+    for i, filter_level in enumerate(filter_levels):
+        if filter_level == "#":
+            return True
+        if i >= len(levels) or filter_level not in ("+", levels[i]):
+            return False
+    return len(filter_levels) == len(levels)
+
+
+class LocalBroker:
+    """In-process stand-in for an MQTT broker.
+
+    Messages are delivered on the next iteration of the event loop, so a
+    publisher never runs its subscribers' callbacks re-entrantly.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the broker on a running loop."""
+        self._loop = loop
+        self._router = TopicRouter()
+        self.messages = 0
+
+    def subscribe(
+        self, topic_filter: str, callback: MessageCallback
+    ) -> Callable[[], None]:
+        """Subscribe to a topic filter and return a function to unsubscribe."""
+        return self._router.add(topic_filter, callback)
+
+    def publish(self, topic: str, payload: str) -> None:
+        """Deliver a message to every matching subscription."""
+        self.messages += 1
+        for callback in self._router.match(topic):
+            self._loop.call_soon(callback, topic, payload)
+
+
+class PahoTransport:
+    """Connection to an MQTT broker shared by all simulated devices.
+
+    paho-mqtt runs its network loop in a thread, so incoming messages are
+    handed over to the event loop before they reach a device.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        host: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
+        """Initialize the connection, without connecting yet."""
+        from paho.mqtt import client as mqtt  # noqa: PLC0415
+
+        self._loop = loop
+        self._router = TopicRouter()
+        self._filters: list[str] = []
+        self._host = host
+        self._port = port
+        self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        if username is not None:
+            self._client.username_pw_set(username, password)
+        self._client.on_connect = self._on_connect
+        self._client.on_message = self._on_message
+        self.messages = 0
+
+    def connect(self) -> None:
+        """Connect in the background, reconnecting when the connection drops."""
+        self._client.connect_async(self._host, self._port)
+        self._client.loop_start()
+
+    def disconnect(self) -> None:
+        """Disconnect and stop the network thread."""
+        self._client.disconnect()
+        self._client.loop_stop()
+
+    def subscribe(
+        self, topic_filter: str, callback: MessageCallback
+    ) -> Callable[[], None]:
+        """Subscribe to a topic filter and return a function to unsubscribe."""
+        remove = self._router.add(topic_filter, callback)
+        self._filters.append(topic_filter)
+        if self._client.is_connected():
+            self._client.subscribe(topic_filter)
+
+        def unsubscribe() -> None:
+            remove()
+            self._filters.remove(topic_filter)
+            self._client.unsubscribe(topic_filter)
+
+        return unsubscribe
+
+    def publish(self, topic: str, payload: str) -> None:
+        """Publish a message."""
+        self.messages += 1
+        self._client.publish(topic, payload)
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties) -> None:
+        """Subscribe to every filter again after (re)connecting."""
+        print(f"Connected to {self._host}:{self._port}: {reason_code}")
+        if self._filters:
+            client.subscribe([(topic_filter, 0) for topic_filter in self._filters])
+
+    def _on_message(self, client, userdata, message) -> None:
+        """Hand a message over to the event loop."""
+        self._loop.call_soon_threadsafe(
+            self._dispatch, message.topic, message.payload.decode()
+        )
+
+    def _dispatch(self, topic: str, payload: str) -> None:
+        """Deliver a message to every matching subscription."""
+        for callback in self._router.match(topic):
+            callback(topic, payload)
+
+
+# Devices
+
+
+class SimulatedJooki:
+    """A Jooki device answering under one bridge prefix."""
+
+    def __init__(
+        self,
+        prefix: str,
+        state: dict[str, Any],
+        publish: Callable[[str, str], None],
+        tick_interval: float,
+    ) -> None:
+        """Initialize the device with its full state."""
+        self.prefix = prefix
+        self.state = state
+        self._publish = publish
+        self.tick_interval = tick_interval
+        self.online = True
+        self.commands: Counter[str] = Counter()
+        self._handlers: dict[str, Callable[[dict[str, Any]], None]] = {
+            PING_TOPIC: self._ping,
+            GET_STATE_TOPIC: self._get_state,
+            PLAY_TOPIC: self._play,
+            PAUSE_TOPIC: self._pause,
+            SEEK_TOPIC: self._seek,
+            PREV_TOPIC: lambda _: self._skip(-1),
+            NEXT_TOPIC: lambda _: self._skip(1),
+            VOL_TOPIC: self._set_volume,
+            OFF_TOPIC: self._shutdown,
+            PLAYLIST_PLAY_TOPIC: self._playlist_play,
+            TOY_SAFE_TOPIC: self._set_toy_safe,
+        }
+
+    @property
+    def _audio(self) -> dict[str, Any]:
+        """Return the audio section of the state."""
+        return self.state["audio"]
+
+    def subscribe(self, transport: LocalBroker | PahoTransport) -> None:
+        """Subscribe to the input topics of the device."""
+        for suffix in (PING_TOPIC, INPUT_SUFFIX):
+            transport.subscribe(f"{self.prefix}/{suffix}", self.message_received)
+
+    def message_received(self, topic: str, payload: str) -> None:
+        """Apply a command."""
+        suffix = topic[len(self.prefix) + 1 :]
+        if not self.online or (handler := self._handlers.get(suffix)) is None:
+            return
+        self.commands[suffix] += 1
+        try:
+            data = json.loads(payload) if payload else {}
+        except ValueError:
+            data = {}
+        handler(data if isinstance(data, dict) else {})
+
+    def _send(self, suffix: str, data: dict[str, Any]) -> None:
+        """Publish a message under the prefix of the device."""
+        self._publish(f"{self.prefix}/{suffix}", json.dumps(data))
+
+    def _send_audio(self, section: str, data: dict[str, Any]) -> None:
+        """Apply a change to an audio section and publish it."""
+        self._audio[section].update(data)
+        self._send(STATE_TOPIC, {"audio": {section: data}})
+
+    def _ping(self, data: dict[str, Any]) -> None:
+        self._send(PONG_TOPIC, {})
+
+    def _get_state(self, data: dict[str, Any]) -> None:
+        self._send(STATE_TOPIC, self.state)
+
+    def _play(self, data: dict[str, Any]) -> None:
+        self._send_audio("playback", {"state": "PLAYING"})
+
+    def _pause(self, data: dict[str, Any]) -> None:
+        self._send_audio("playback", {"state": "PAUSED"})
+
+    def _seek(self, data: dict[str, Any]) -> None:
+        if isinstance(position_ms := data.get("position_ms"), int):
+            self._send_audio("playback", {"position_ms": position_ms})
+
+    def _set_volume(self, data: dict[str, Any]) -> None:
+        if isinstance(volume := data.get("vol"), int):
+            self._send_audio("config", {"volume": max(0, min(100, volume))})
+
+    def _set_toy_safe(self, data: dict[str, Any]) -> None:
+        self.state["device"]["toy_safe"] = enable = bool(data.get("enable"))
+        self._send(STATE_TOPIC, {"device": {"toy_safe": enable}})
+
+    def _shutdown(self, data: dict[str, Any]) -> None:
+        """Stop answering, as a device that has been switched off."""
+        self._audio["playback"]["state"] = "PAUSED"
+        self.online = False
+
+    def _playlist_play(self, data: dict[str, Any]) -> None:
+        playlist_id = data.get("playlistId")
+        if playlist_id not in self.state["db"]["playlists"]:
+            return
+        # Track indexes are one based
+        self._play_track(playlist_id, max(0, int(data.get("trackIndex", 1)) - 1))
+
+    def _skip(self, step: int) -> None:
+        now_playing = self._audio["nowPlaying"]
+        self._play_track(now_playing["playlistId"], now_playing["queueIndex"] + step)
+
+    def _play_track(self, playlist_id: str, index: int) -> None:
+        """Start a track of a playlist and publish the change."""
+        playlist = self.state["db"]["playlists"][playlist_id]
+        track_ids = playlist["tracks"]
+        if not track_ids:
+            return
+        index %= len(track_ids)
+        track = self.state["db"]["tracks"][track_ids[index]]
+        now_playing = {
+            "track": track["title"],
+            "artist": track["artist"],
+            "album": track["album"],
+            "queueIndex": index,
+            "playlistId": playlist_id,
+            "source": playlist["title"],
+            "duration_ms": track["duration_ms"],
+        }
+        self._audio["nowPlaying"].update(now_playing)
+        self._audio["playback"].update(state="PLAYING", position_ms=0)
+        self._send(
+            STATE_TOPIC,
+            {
+                "audio": {
+                    "nowPlaying": now_playing,
+                    "playback": {"state": "PLAYING", "position_ms": 0},
+                }
+            },
+        )
+
+    def tick(self) -> None:
+        """Advance playback by one tick, moving to the next track at its end."""
+        playback = self._audio["playback"]
+        if not self.online or playback["state"] != "PLAYING":
+            return
+        position_ms = playback["position_ms"] + int(self.tick_interval * 1000)
+        if position_ms >= self._audio["nowPlaying"].get("duration_ms", position_ms + 1):
+            self._skip(1)
+        else:
+            self._send_audio("playback", {"position_ms": position_ms})
+
+    async def run(self) -> None:
+        """Stream position ticks until cancelled, starting at a random phase."""
+        await asyncio.sleep(random.uniform(0, self.tick_interval))
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while True:
+            self.tick()
+            due += self.tick_interval
+            await asyncio.sleep(max(0, due - loop.time()))
+
+
+def create_devices(
+    args: argparse.Namespace, publish: Callable[[str, str], None]
+) -> list[SimulatedJooki]:
+    """Return the simulated devices, sharing one library between them."""
+    if args.state:
+        base_state = json.loads(args.state.read_text())
+    else:
+        base_state = full_state(synthetic_db(args.tracks, args.playlists))
+    base_payload = json.dumps(base_state)
+    return [
+        SimulatedJooki(
+            args.prefix_template.format(n=n),
+            # Each device mutates its own copy
+            json.loads(base_payload),
+            publish,
+            args.tick_interval,
+        )
+        for n in range(args.count)
+    ]
+
+
+# Runners
+
+
+async def run_broker(args: argparse.Namespace) -> None:
+    """Run the devices against an MQTT broker."""
+    transport = PahoTransport(
+        asyncio.get_running_loop(), args.host, args.port, args.username, args.password
+    )
+    devices = create_devices(args, transport.publish)
+    for device in devices:
+        device.subscribe(transport)
+    transport.connect()
+    print(f"Simulating {len(devices)} devices on {args.host}:{args.port}")
+
+    tasks = [asyncio.create_task(device.run()) for device in devices]
+    try:
+        await report(args, lambda: f"{transport.messages} messages published")
+    finally:
+        for task in tasks:
+            task.cancel()
+        transport.disconnect()
+
+
+async def run_local(args: argparse.Namespace) -> None:
+    """Run the devices in-process against Jooki coordinators."""
+    from unittest.mock import patch  # noqa: PLC0415
+
+    from custom_components.jooki.const import (  # noqa: PLC0415
+        CONF_COALESCE_WINDOW,
+        CONF_HEARTBEAT_INTERVAL,
+        CONF_PROBE_INTERVAL,
+    )
+    from custom_components.jooki.coordinator import JookiCoordinator  # noqa: PLC0415
+    from custom_components.jooki.media_player import JookiMediaPlayer  # noqa: PLC0415
+
+    from .benchmark import StubHass  # noqa: PLC0415
+
+    loop = asyncio.get_running_loop()
+    hass = StubHass(loop)
+    broker = LocalBroker(loop)
+    devices = create_devices(args, broker.publish)
+    for device in devices:
+        device.subscribe(broker)
+
+    async def async_subscribe(hass, topic, msg_callback, *args, **kwargs):
+        # Like Home Assistant, deliver bytes to subscriptions without encoding
+        raw = kwargs.get("encoding", "utf-8") is None
+
+        def deliver(topic: str, payload: str) -> None:
+            msg_callback(MessageStub(topic, payload.encode() if raw else payload))
+
+        return broker.subscribe(topic, deliver)
+
+    async def async_publish(hass, topic, payload, *args, **kwargs) -> None:
+        broker.publish(topic, payload)
+
+    options = {
+        CONF_COALESCE_WINDOW: args.coalesce_window,
+        CONF_HEARTBEAT_INTERVAL: args.heartbeat_interval,
+        CONF_PROBE_INTERVAL: args.heartbeat_interval / 5,
+    }
+    coordinators = []
+    with (
+        patch("homeassistant.components.mqtt.async_subscribe", async_subscribe),
+        patch("homeassistant.components.mqtt.async_publish", async_publish),
+    ):
+        for device in devices:
+            coordinator = JookiCoordinator(hass, device.prefix, options)
+            player = JookiMediaPlayer(f"Jooki {device.prefix}", coordinator)
+            player.hass = hass
+            player.entity_id = f"media_player.{device.prefix}"
+            player.async_write_ha_state = _counting_write(coordinator, player.entity_id)
+            coordinator.async_add_listener(
+                player._handle_coordinator_update,  # noqa: SLF001
+                player.coordinator_context,
+            )
+            coordinators.append(coordinator)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(coordinator.async_start() for coordinator in coordinators)
+        )
+        print(
+            f"Started {len(coordinators)} coordinators "
+            f"in {time.perf_counter() - start:.2f} s"
+        )
+
+        tasks = [asyncio.create_task(device.run()) for device in devices]
+        if args.command_interval:
+            tasks.extend(
+                asyncio.create_task(send_commands(coordinator, args.command_interval))
+                for coordinator in coordinators
+            )
+
+        def summary() -> str:
+            available = sum(coordinator.available for coordinator in coordinators)
+            dispatched = sum(
+                coordinator.counters.notifications_dispatched
+                for coordinator in coordinators
+            )
+            writes = sum(
+                coordinator.counters.state_writes.total()
+                for coordinator in coordinators
+            )
+            return (
+                f"{broker.messages} messages, {available}/{len(coordinators)} "
+                f"available, {dispatched} notifications, {writes} state writes"
+            )
+
+        try:
+            await report(args, summary)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for coordinator in coordinators:
+                await coordinator.async_stop()
+
+    if args.verbose:
+        merged: dict[str, list[float]] = {}
+        for coordinator in coordinators:
+            for name, timing in coordinator.counters.timings.items():
+                totals = merged.setdefault(name, [0, 0.0, 0.0])
+                totals[0] += timing.count
+                totals[1] += timing.total
+                totals[2] = max(totals[2], timing.max)
+        for name, (count, total, longest) in merged.items():
+            print(
+                f"  {name}: {count} calls, mean {total / max(count, 1) * 1e6:.1f} us, "
+                f"max {longest * 1e6:.1f} us"
+            )
+
+
+class MessageStub:
+    """Received message with the attributes the integration reads."""
+
+    __slots__ = ("payload", "topic")
+
+    def __init__(self, topic: str, payload: bytes | str) -> None:
+        """Initialize the message."""
+        self.topic = topic
+        self.payload = payload
+
+
+def _counting_write(coordinator: Any, entity_id: str) -> Callable[[], None]:
+    """Return a stand-in for async_write_ha_state that only counts writes."""
+
+    def write() -> None:
+        coordinator.counters.state_writes[entity_id] += 1
+
+    return write
+
+
+async def send_commands(coordinator: Any, interval: float) -> None:
+    """Send random commands through a coordinator until cancelled."""
+    playlist_ids = list(coordinator.get_state("db.playlists") or ())
+    while True:
+        await asyncio.sleep(random.expovariate(1 / interval))
+        choice = random.random()
+        if choice < 0.4:
+            await coordinator.async_publish(VOL_TOPIC, {"vol": random.randint(0, 100)})
+        elif choice < 0.7:
+            await coordinator.async_publish(random.choice([PLAY_TOPIC, PAUSE_TOPIC]))
+        elif playlist_ids:
+            await coordinator.async_publish(
+                PLAYLIST_PLAY_TOPIC,
+                {"playlistId": random.choice(playlist_ids), "trackIndex": 1},
+            )
+
+
+async def report(args: argparse.Namespace, summary: Callable[[], str]) -> None:
+    """Print a summary and the event loop lag periodically until the duration ends."""
+    loop = asyncio.get_running_loop()
+    end = loop.time() + args.duration if args.duration else None
+    while end is None or loop.time() < end:
+        due = loop.time() + args.report_interval
+        await asyncio.sleep(args.report_interval)
+        lag = loop.time() - due
+        print(f"{summary()}, loop lag {lag * 1000:.1f} ms")
+
+
+def main() -> int:
+    """Parse arguments and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1, help="number of devices")
+    parser.add_argument(
+        "--prefix-template",
+        default="jooki{n}",
+        help="bridge prefix of each device, formatted with its number n",
+    )
+    parser.add_argument("--local", action="store_true", help="run in-process")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument(
+        "--tick-interval", type=float, default=1.0, help="seconds between ticks"
+    )
+    parser.add_argument("--state", type=Path, help="JSON file with the full state")
+    parser.add_argument("--tracks", type=int, default=500)
+    parser.add_argument("--playlists", type=int, default=20)
+    parser.add_argument(
+        "--duration", type=float, default=0, help="seconds; 0 runs until interrupted"
+    )
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument(
+        "--command-interval",
+        type=float,
+        default=0,
+        help="mean seconds between random commands per device, with --local",
+    )
+    parser.add_argument("--coalesce-window", type=float, default=0.25)
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0)
+    parser.add_argument("--verbose", action="store_true", help="print timings")
+    args = parser.parse_args()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(run_local(args) if args.local else run_broker(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())